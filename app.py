@@ -2,22 +2,39 @@
 Flask Text-to-Speech Application
 Main application file with routes and API endpoints
 """
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file
 from flask_cors import CORS
 from pathlib import Path
+from collections import OrderedDict
+import hashlib
+import tempfile
 import logging
+import orjson
 import uuid
 import os
+import threading
 from datetime import datetime
 
 from config import get_config
 from utils.tts_engine import TTSEngine
 from utils.text_processor import TextProcessor
+from utils.batch_scheduler import BatchScheduler
+from utils.audio_cache import AudioCache
+from utils.audio_utils import AudioUtils
+from utils.json_provider import ORJSONProvider
+try:
+    from apscheduler.schedulers.background import BackgroundScheduler
+    APSCHEDULER_AVAILABLE = True
+except ImportError:
+    APSCHEDULER_AVAILABLE = False
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(get_config())
 
+# Serialize JSON responses with orjson
+app.json = ORJSONProvider(app)
+
 # Enable CORS for API endpoints
 CORS(app)
 
@@ -31,26 +48,185 @@ logger = logging.getLogger(__name__)
 # Initialize TTS Engine (lazy loading)
 tts_engine = None
 
+# Guards lazy initialization when several request threads arrive at once
+_init_lock = threading.RLock()
+
 def get_tts_engine():
     """
     Get or initialize TTS Engine (singleton pattern)
     Lazy loading to avoid loading model on import
     """
     global tts_engine
-    if tts_engine is None:
-        logger.info("Initializing TTS Engine...")
-        device = "cuda" if app.config['USE_GPU'] else "cpu"
-        tts_engine = TTSEngine(
-            model_name=app.config['MODEL_NAME'],
-            device=device,
-            cache_dir=app.config['MODEL_CACHE_DIR']
-        )
-        logger.info("TTS Engine initialized successfully")
+    with _init_lock:
+        if tts_engine is None:
+            logger.info("Initializing TTS Engine...")
+            device = "cuda" if app.config['USE_GPU'] else "cpu"
+            tts_engine = TTSEngine(
+                model_name=app.config['MODEL_NAME'],
+                device=device,
+                cache_dir=app.config['MODEL_CACHE_DIR'],
+                dtype=app.config['MODEL_DTYPE'],
+                compile_model=app.config['MODEL_COMPILE'],
+                voice_prompt_cache_size=(
+                    app.config['VOICE_PROMPT_CACHE_SIZE'] if app.config['BARK_KV_REUSE'] else 0
+                )
+            )
+            logger.info("TTS Engine initialized successfully")
     return tts_engine
 
+# Initialize batch scheduler (lazy loading, wraps the TTS engine)
+batch_scheduler = None
+
+def get_batch_scheduler():
+    """
+    Get or initialize the batch scheduler (singleton pattern)
+    Concurrent synthesis requests are queued here and decoded together
+    """
+    global batch_scheduler
+    with _init_lock:
+        if batch_scheduler is None:
+            batch_scheduler = BatchScheduler(
+                get_tts_engine(),
+                max_batch_size=app.config['BATCH_MAX_SIZE'],
+                batch_wait_timeout_s=app.config['BATCH_WAIT_TIMEOUT_S']
+            )
+            logger.info("Batch scheduler started")
+    return batch_scheduler
+
+# Initialize audio cache (lazy loading, restores the on-disk index)
+audio_cache = None
+
+def get_audio_cache():
+    """
+    Get or initialize the synthesized audio cache (singleton pattern)
+    """
+    global audio_cache
+    with _init_lock:
+        if audio_cache is None:
+            audio_cache = AudioCache(
+                app.config['AUDIO_CACHE_DIR'],
+                maxsize=app.config['AUDIO_CACHE_SIZE']
+            )
+    return audio_cache
+
+def warmup_tts_engine():
+    """
+    Load the model and run one short generation ahead of traffic
+    so the first user doesn't pay for model init and first-call kernel setup
+    """
+    try:
+        engine = get_tts_engine()
+        engine.text_to_speech_bytes("Warming up.", voice_preset=None)
+        logger.info("TTS Engine warmed up")
+    except Exception as e:
+        logger.error(f"TTS Engine warm-up failed: {e}", exc_info=True)
+
 # Ensure output directory exists
 app.config['AUDIO_OUTPUT_DIR'].mkdir(parents=True, exist_ok=True)
 
+# Recently generated audio kept in memory (filename -> encoded bytes, LRU order)
+# Entries are only written to AUDIO_OUTPUT_DIR when evicted
+RECENT_AUDIO = OrderedDict()
+_recent_audio_bytes = 0 # Total size of RECENT_AUDIO values
+# Evicted entries still being written to disk; served from here until the file is complete
+_SPILLING_AUDIO = {}
+_recent_audio_lock = threading.Lock()
+
+def write_audio_file(filename, data):
+    """
+    Write audio into AUDIO_OUTPUT_DIR through a temp file and os.replace,
+    so send_file never sees a partially written file
+    
+    Args:
+        filename: Audio file name
+        data: Encoded audio bytes
+    """
+    audio_dir = app.config['AUDIO_OUTPUT_DIR']
+    fd, tmp_path = tempfile.mkstemp(dir=audio_dir, prefix=f"{filename}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        # mkstemp creates owner-only files; the front-end server reads these via X-Accel-Redirect
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, audio_dir / filename)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def remember_audio(filename, data):
+    """
+    Keep generated audio in memory, spilling the least recently used entries to disk
+    
+    Args:
+        filename: Audio file name (as used in /audio/<filename>)
+        data: Encoded audio bytes
+    """
+    global _recent_audio_bytes
+    evicted = []
+    with _recent_audio_lock:
+        previous = RECENT_AUDIO.pop(filename, None)
+        if previous is not None:
+            _recent_audio_bytes -= len(previous)
+        RECENT_AUDIO[filename] = data
+        _recent_audio_bytes += len(data)
+        # Oldest first; a clip larger than the whole budget goes straight to disk
+        while _recent_audio_bytes > app.config['RECENT_AUDIO_MAX_BYTES']:
+            evicted_name, evicted_data = RECENT_AUDIO.popitem(last=False)
+            _recent_audio_bytes -= len(evicted_data)
+            _SPILLING_AUDIO[evicted_name] = evicted_data
+            evicted.append((evicted_name, evicted_data))
+    
+    # Written outside the lock; recall_audio keeps serving the bytes until the file is in place
+    for evicted_name, evicted_data in evicted:
+        try:
+            write_audio_file(evicted_name, evicted_data)
+        finally:
+            with _recent_audio_lock:
+                if _SPILLING_AUDIO.get(evicted_name) is evicted_data:
+                    del _SPILLING_AUDIO[evicted_name]
+
+def recall_audio(filename):
+    """
+    Look up in-memory audio
+    
+    Args:
+        filename: Audio file name
+    
+    Returns:
+        Encoded audio bytes, or None if not held in memory
+    """
+    with _recent_audio_lock:
+        data = RECENT_AUDIO.get(filename)
+        if data is not None:
+            RECENT_AUDIO.move_to_end(filename)
+            return data
+        return _SPILLING_AUDIO.get(filename)
+
+# Fixed error bodies, serialized once at import
+ERROR_BODIES = {
+    message: orjson.dumps({'success': False, 'error': message})
+    for message in ('No text provided', 'Audio file not found', 'Endpoint not found', 'Internal server error')
+}
+
+def error_response(message, status):
+    """
+    Build a JSON error response, reusing the prebuilt body for fixed messages
+    
+    Args:
+        message: Error message
+        status: HTTP status code
+    
+    Returns:
+        Flask Response
+    """
+    body = ERROR_BODIES.get(message)
+    if body is None:
+        body = orjson.dumps({'success': False, 'error': message})
+    return Response(body, status=status, mimetype='application/json')
+
 # ==================== ROUTES ====================
 
 @app.route('/')
@@ -74,45 +250,89 @@ def health():
 
 # ==================== API ENDPOINTS ====================
 
+def parse_synthesis_request(data):
+    """
+    Validate a synthesis request body and preprocess its text
+    
+    Args:
+        data: Parsed JSON request body
+    
+    Returns:
+        tuple: (processed_text, voice_preset, error_message or None)
+    """
+    if not data or 'text' not in data:
+        return None, None, 'No text provided'
+    
+    text = data.get('text', '')
+    
+    voice_preset = data.get('voice_preset')
+    # If the frontend sends "" or null, force it to None for Bark
+    if not voice_preset or voice_preset == "" or voice_preset == "null":
+        voice_preset = None
+    
+    # Presets become file paths inside the processor, so only known ones get through
+    if voice_preset not in VOICE_IDS:
+        return None, None, f"Unknown voice preset: {voice_preset}"
+    
+    # Validate and preprocess text
+    is_valid, error_msg, processed_text = TextProcessor.validate_and_preprocess(
+        text, max_length=app.config['MAX_TEXT_LENGTH']
+    )
+    
+    if not is_valid:
+        return None, None, error_msg
+    
+    return processed_text, voice_preset, None
+
 @app.route('/api/synthesize', methods=['POST'])
 def synthesize():
     try:
         data = request.get_json()
         
-        if not data or 'text' not in data:
-            return jsonify({'success': False, 'error': 'No text provided'}), 400
-        
-        text = data.get('text', '')
+        processed_text, voice_preset, error_msg = parse_synthesis_request(data)
         
-        voice_preset = data.get('voice_preset')
-        # If the frontend sends "" or null, force it to None for Bark
-        if not voice_preset or voice_preset == "" or voice_preset == "null":
-            voice_preset = None
+        if error_msg:
+            return error_response(error_msg, 400)
         
-        # Validate and preprocess text
-        is_valid, error_msg = TextProcessor.validate_text(
-            text, max_length=app.config['MAX_TEXT_LENGTH']
-        )
-        
-        if not is_valid:
-            return jsonify({'success': False, 'error': error_msg}), 400
-        
-        processed_text = TextProcessor.preprocess_for_tts(
-            text, max_length=app.config['MAX_TEXT_LENGTH']
-        )
+        # Cache mode: "on" reads and writes, "read_only" never stores, "off" bypasses
+        cache_options = data.get('cache_options') or {}
+        cache_mode = cache_options.get('enabled', 'on') if isinstance(cache_options, dict) else None
+        if cache_mode not in AudioCache.MODES:
+            return jsonify({
+                'success': False,
+                'error': f"Invalid cache_options.enabled (expected one of {', '.join(AudioCache.MODES)})"
+            }), 400
         
-        # Generate unique filename (The backend generates this as you requested)
+        # Generate unique id (The backend generates this as you requested)
         audio_id = str(uuid.uuid4())
-        audio_filename = f"{audio_id}.{app.config['AUDIO_FORMAT']}"
-        audio_path = app.config['AUDIO_OUTPUT_DIR'] / audio_filename
         
-        # Get TTS engine and generate
-        engine = get_tts_engine()
-        engine.text_to_speech_file(
-            processed_text,
-            audio_path,
-            voice_preset=voice_preset
-        )
+        # Reuse previously rendered audio for identical requests
+        cache = get_audio_cache()
+        cache_key = AudioCache.make_key(processed_text, voice_preset)
+        cached_path = cache.get(cache_key) if cache_mode != 'off' else None
+        
+        if cached_path is not None:
+            audio_filename = f"{audio_id}{cached_path.suffix}"
+            audio_path = app.config['AUDIO_OUTPUT_DIR'] / audio_filename
+            AudioCache.restore(cached_path, audio_path)
+            logger.info(f"Served synthesis from cache: {cache_key}")
+        else:
+            # Queue for batched generation and wait for this request's slice
+            # Each request has its own server thread, so waiting requests batch together
+            audio_array, sample_rate = get_batch_scheduler().infer(
+                processed_text,
+                voice_preset=voice_preset
+            )
+            engine = get_tts_engine()
+            audio_data, audio_format = engine.encode_audio(
+                audio_array, sample_rate, app.config['AUDIO_FORMAT']
+            )
+            audio_filename = f"{audio_id}.{audio_format}"
+            
+            # Serve from memory; the file is only written if evicted
+            remember_audio(audio_filename, audio_data)
+            if cache_mode == 'on':
+                cache.put_data(cache_key, audio_data, f".{audio_format}")
         
         # Return success with the backend-generated URL
         return jsonify({
@@ -120,6 +340,7 @@ def synthesize():
             'audio_url': f'/audio/{audio_filename}',
             'audio_id': audio_id,
             'text': processed_text,
+            'cached': cached_path is not None,
             'estimated_duration': TextProcessor.estimate_duration(processed_text),
             'timestamp': datetime.now().isoformat()
         })
@@ -128,6 +349,59 @@ def synthesize():
         logger.error(f"Error in synthesis: {e}", exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/synthesize/stream', methods=['POST'])
+def synthesize_stream():
+    """
+    Stream synthesized audio as a chunked WAV response
+    The header is sent immediately and PCM data follows sentence by sentence
+    
+    Each sentence is a separate generation, so a request without a voice preset
+    gets STREAM_VOICE_PRESET for every sentence instead of a random speaker per sentence
+    """
+    try:
+        data = request.get_json()
+        
+        processed_text, voice_preset, error_msg = parse_synthesis_request(data)
+        
+        if error_msg:
+            return error_response(error_msg, 400)
+        
+        # Keep one speaker across the whole stream
+        if voice_preset is None:
+            voice_preset = app.config['STREAM_VOICE_PRESET']
+        
+        engine = get_tts_engine()
+        
+        # Queue every sentence up front: they are decoded in batches (together with
+        # other users' sentences) while earlier ones are already being sent
+        scheduler = get_batch_scheduler()
+        sentences = TextProcessor.split_sentences(processed_text) or [processed_text]
+        futures = [scheduler.submit(sentence, voice_preset=voice_preset) for sentence in sentences]
+    
+    except Exception as e:
+        logger.error(f"Error in streaming synthesis: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    def generate():
+        # Length is unknown until generation finishes, so the header uses a placeholder
+        yield AudioUtils.wav_header(engine.sample_rate)
+        try:
+            for future in futures:
+                audio_array, _ = future.result()
+                yield engine.to_int16(audio_array).tobytes()
+        except Exception as e:
+            # Headers are already sent; all we can do is end the stream early
+            logger.error(f"Error while streaming synthesis: {e}", exc_info=True)
+        finally:
+            # Client went away or a sentence failed: drop sentences not yet started
+            for future in futures:
+                future.cancel()
+    
+    return Response(generate(), mimetype='audio/wav', headers={'Cache-Control': 'no-store'})
+
+# Audio file extension -> MIME type
+AUDIO_MIMETYPES = {'.mp3': 'audio/mpeg', '.wav': 'audio/wav'}
+
 @app.route('/audio/<filename>')
 def serve_audio(filename):
     """
@@ -137,26 +411,34 @@ def serve_audio(filename):
         filename: Audio file name
     """
     try:
+        # Determine MIME type based on file extension (WAV by default)
+        mimetype = AUDIO_MIMETYPES.get(os.path.splitext(filename)[1].lower(), 'audio/wav')
+        
+        # Recently generated audio is served straight from memory
+        audio_data = recall_audio(filename)
+        if audio_data is not None:
+            logger.info(f"Serving audio from memory: {filename}, size: {len(audio_data)} bytes")
+            response = Response(audio_data, mimetype=mimetype)
+            return response.make_conditional(request, accept_ranges=True, complete_length=len(audio_data))
+        
         audio_path = app.config['AUDIO_OUTPUT_DIR'] / filename
         
-        if not audio_path.exists():
-            return jsonify({
-                'success': False,
-                'error': 'Audio file not found'
-            }), 404
+        if filename.startswith('.') or not audio_path.is_file():
+            return error_response('Audio file not found', 404)
         
         # Check file size for debugging
         file_size = audio_path.stat().st_size
         logger.info(f"Serving audio file: {filename}, size: {file_size} bytes")
         
-        # Determine MIME type based on file extension
-        if filename.lower().endswith('.mp3'):
-            mimetype = 'audio/mpeg'
-        elif filename.lower().endswith('.wav'):
-            mimetype = 'audio/wav'
-        else:
-            mimetype = 'audio/wav'  # default
+        # Behind nginx, hand the transfer to its internal location so the
+        # bytes go out via sendfile(2) without passing through Python
+        accel_prefix = app.config['AUDIO_ACCEL_REDIRECT_PREFIX']
+        if accel_prefix:
+            response = Response(mimetype=mimetype)
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+            return response
         
+        # Otherwise send_file (which emits X-Sendfile instead when USE_X_SENDFILE is set)
         return send_file(
             audio_path,
             mimetype=mimetype,
@@ -171,6 +453,29 @@ def serve_audio(filename):
             'error': 'Failed to serve audio file'
         }), 500
 
+# Bark voice presets
+VOICES = [
+    {'id': None, 'name': 'Default', 'language': 'en'},
+    {'id': 'v2/en_speaker_0', 'name': 'Speaker 0 (Male)', 'language': 'en'},
+    {'id': 'v2/en_speaker_1', 'name': 'Speaker 1 (Male)', 'language': 'en'},
+    {'id': 'v2/en_speaker_2', 'name': 'Speaker 2 (Male)', 'language': 'en'},
+    {'id': 'v2/en_speaker_3', 'name': 'Speaker 3 (Male)', 'language': 'en'},
+    {'id': 'v2/en_speaker_4', 'name': 'Speaker 4 (Male)', 'language': 'en'},
+    {'id': 'v2/en_speaker_5', 'name': 'Speaker 5 (Female)', 'language': 'en'},
+    {'id': 'v2/en_speaker_6', 'name': 'Speaker 6 (Female)', 'language': 'en'},
+    {'id': 'v2/en_speaker_7', 'name': 'Speaker 7 (Female)', 'language': 'en'},
+    {'id': 'v2/en_speaker_8', 'name': 'Speaker 8 (Female)', 'language': 'en'},
+    {'id': 'v2/en_speaker_9', 'name': 'Speaker 9 (Female)', 'language': 'en'},
+]
+
+# Presets accepted by the synthesis endpoints (None is Bark's default voice)
+VOICE_IDS = frozenset(voice['id'] for voice in VOICES)
+
+# The list never changes, so it is serialized once at import
+VOICES_JSON = orjson.dumps({'success': True, 'voices': VOICES})
+VOICES_ETAG = hashlib.blake2b(VOICES_JSON, digest_size=8).hexdigest()
+VOICES_MAX_AGE = 86400 # Lets browsers, nginx or a CDN answer without reaching Flask
+
 @app.route('/api/voices', methods=['GET'])
 def get_voices():
     """
@@ -179,25 +484,12 @@ def get_voices():
     Returns:
         JSON list of available voices
     """
-    # Bark voice presets
-    voices = [
-        {'id': None, 'name': 'Default', 'language': 'en'},
-        {'id': 'v2/en_speaker_0', 'name': 'Speaker 0 (Male)', 'language': 'en'},
-        {'id': 'v2/en_speaker_1', 'name': 'Speaker 1 (Male)', 'language': 'en'},
-        {'id': 'v2/en_speaker_2', 'name': 'Speaker 2 (Male)', 'language': 'en'},
-        {'id': 'v2/en_speaker_3', 'name': 'Speaker 3 (Male)', 'language': 'en'},
-        {'id': 'v2/en_speaker_4', 'name': 'Speaker 4 (Male)', 'language': 'en'},
-        {'id': 'v2/en_speaker_5', 'name': 'Speaker 5 (Female)', 'language': 'en'},
-        {'id': 'v2/en_speaker_6', 'name': 'Speaker 6 (Female)', 'language': 'en'},
-        {'id': 'v2/en_speaker_7', 'name': 'Speaker 7 (Female)', 'language': 'en'},
-        {'id': 'v2/en_speaker_8', 'name': 'Speaker 8 (Female)', 'language': 'en'},
-        {'id': 'v2/en_speaker_9', 'name': 'Speaker 9 (Female)', 'language': 'en'},
-    ]
-    
-    return jsonify({
-        'success': True,
-        'voices': voices
-    })
+    # A fresh Response per request: after_request hooks (CORS) add headers to it
+    response = Response(VOICES_JSON, mimetype='application/json')
+    response.set_etag(VOICES_ETAG)
+    response.cache_control.public = True
+    response.cache_control.max_age = VOICES_MAX_AGE
+    return response.make_conditional(request)
 
 @app.route('/api/test', methods=['GET'])
 def test_tts():
@@ -208,13 +500,16 @@ def test_tts():
     try:
         test_text = "Hello! This is a test of the text to speech system."
         
-        # Generate test audio
+        # Generate test audio in memory (no file is written unless it is evicted)
         audio_id = "test"
-        audio_filename = f"{audio_id}.{app.config['AUDIO_FORMAT']}"
-        audio_path = app.config['AUDIO_OUTPUT_DIR'] / audio_filename
-        
         engine = get_tts_engine()
-        engine.text_to_speech_file(test_text, audio_path)
+        audio_data, audio_format = engine.text_to_speech_bytes(
+            test_text, audio_format=app.config['AUDIO_FORMAT']
+        )
+        
+        # Name the file after the format actually produced (MP3 falls back to WAV)
+        audio_filename = f"{audio_id}.{audio_format}"
+        remember_audio(audio_filename, audio_data)
         
         return jsonify({
             'success': True,
@@ -235,7 +530,7 @@ def test_tts():
 def not_found(e):
     """Handle 404 errors"""
     if request.path.startswith('/api/'):
-        return jsonify({'success': False, 'error': 'Endpoint not found'}), 404
+        return error_response('Endpoint not found', 404)
     return render_template('index.html'), 404
 
 @app.errorhandler(500)
@@ -243,41 +538,86 @@ def internal_error(e):
     """Handle 500 errors"""
     logger.error(f"Internal error: {e}", exc_info=True)
     if request.path.startswith('/api/'):
-        return jsonify({'success': False, 'error': 'Internal server error'}), 500
+        return error_response('Internal server error', 500)
     return "Internal Server Error", 500
 
 # ==================== CLEANUP TASK ====================
 
 def cleanup_old_files():
     """
-    Remove old audio files (should be run periodically)
-    In production, use a scheduler like APScheduler
+    Remove old audio files (run periodically by the background scheduler)
     """
     try:
         audio_dir = app.config['AUDIO_OUTPUT_DIR']
         retention_time = app.config['AUDIO_RETENTION_TIME']
         current_time = datetime.now().timestamp()
         
-        for audio_file in audio_dir.glob('*.*'):
-            # Only process audio files (wav, mp3, etc.)
-            if audio_file.suffix.lower() not in ['.wav', '.mp3']:
-                continue
-            file_age = current_time - audio_file.stat().st_mtime
-            if file_age > retention_time:
-                audio_file.unlink()
-                logger.info(f"Deleted old file: {audio_file.name}")
+        # scandir returns file type and cached stat info with each directory entry
+        with os.scandir(audio_dir) as entries:
+            for entry in entries:
+                # Only process audio files (wav, mp3, etc.)
+                if not entry.is_file() or not entry.name.lower().endswith(('.wav', '.mp3')):
+                    continue
+                file_age = current_time - entry.stat().st_mtime
+                if file_age > retention_time:
+                    os.unlink(entry.path)
+                    logger.info(f"Deleted old file: {entry.name}")
                 
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
 
+def start_cleanup_scheduler():
+    """
+    Run cleanup_old_files off the request path on a background scheduler
+    
+    Returns:
+        The started BackgroundScheduler, or None if disabled/unavailable
+    """
+    interval = app.config['CLEANUP_INTERVAL_MINUTES']
+    if interval <= 0:
+        return None
+    
+    if not APSCHEDULER_AVAILABLE:
+        logger.warning("APScheduler not available, old audio files will not be cleaned up automatically")
+        return None
+    
+    scheduler = BackgroundScheduler(daemon=True)
+    scheduler.add_job(
+        cleanup_old_files,
+        'interval',
+        minutes=interval,
+        id='cleanup_old_files',
+        coalesce=True,
+        max_instances=1
+    )
+    scheduler.start()
+    logger.info(f"Audio cleanup scheduled every {interval} minutes")
+    return scheduler
+
+cleanup_scheduler = start_cleanup_scheduler()
+
+# Load weights once in the parent so forked workers share them (copy-on-write, never written)
+# CUDA cannot be initialized before fork, so GPU workers always load their own copy
+if app.config['MODEL_PRELOAD']:
+    if app.config['USE_GPU']:
+        logger.warning("MODEL_PRELOAD is ignored on GPU, each worker loads the model itself")
+    else:
+        get_tts_engine()
+
+# Warm up at startup instead of on the first /api/synthesize
+if app.config['WARMUP_ON_START']:
+    warmup_tts_engine()
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
-    # Note: In production, use a proper WSGI server like Gunicorn
-    # gunicorn -w 4 -b 0.0.0.0:5000 app:app
+    # Note: In production, use Gunicorn with threaded workers (see gunicorn.conf.py)
+    # gunicorn -c gunicorn.conf.py app:app
     
+    # Requests must run on their own threads so concurrent ones reach the batch scheduler together
     app.run(
         host='0.0.0.0',
         port=5000,
-        debug=app.config['DEBUG']
+        debug=app.config['DEBUG'],
+        threaded=True
     )
\ No newline at end of file
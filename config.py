@@ -23,14 +23,58 @@ class Config:
     # Auto-detect CUDA availability for GPU usage
     USE_GPU = bool(os.environ.get('USE_GPU', 'False').lower() == 'true')
     
+    # Model precision: 'float32', 'bfloat16', 'float16' (GPU) or 'int8' (CPU dynamic quantization)
+    # 'auto' uses float16 on GPU and float32 on CPU
+    MODEL_DTYPE = os.environ.get('MODEL_DTYPE', 'auto')
+    # Compile the Bark sub-models with torch.compile (slower startup; benchmark before enabling)
+    # Pair with WARMUP=1 so compilation happens before the first request
+    MODEL_COMPILE = os.environ.get('MODEL_COMPILE', 'False').lower() == 'true'
+    
+    # Load the model weights when app.py is imported (CPU only). Under a pre-forking server
+    # with preload_app, workers then share the parent's weight pages instead of each loading a copy
+    MODEL_PRELOAD = os.environ.get('MODEL_PRELOAD', '0') == '1'
+    
+    # Load and warm up the model at startup (WARMUP=1) instead of on the first request
+    WARMUP_ON_START = os.environ.get('WARMUP', '0') == '1'
+    
+    # Keep voice preset history prompts loaded on the device between requests (BARK_KV_REUSE=0 to disable)
+    BARK_KV_REUSE = os.environ.get('BARK_KV_REUSE', '1') == '1'
+    VOICE_PROMPT_CACHE_SIZE = int(os.environ.get('VOICE_PROMPT_CACHE_SIZE', 16)) # Max presets kept (LFU eviction)
+    
+    # Streams are generated sentence by sentence; without a preset Bark picks a random
+    # speaker for every generation, so streams without one use this preset for all sentences
+    STREAM_VOICE_PRESET = os.environ.get('STREAM_VOICE_PRESET', 'v2/en_speaker_6')
+    
+    # Dynamic batching: concurrent requests are grouped into one generate call
+    BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 8)) # Max requests per batch
+    BATCH_WAIT_TIMEOUT_S = float(os.environ.get('BATCH_WAIT_TIMEOUT_S', 0.05)) # Max wait for a batch to fill
+    
     # 3. Audio Output Settings
     AUDIO_OUTPUT_DIR = Path('./audio_output') # Directory to save generated audio files
     AUDIO_FORMAT = 'wav' # File format for output (e.g., 'wav', 'mp3')
     
+    # Recently generated audio is served from memory and written to disk only on eviction
+    # Bounded by total size, since one clip can be several MB
+    # Use 0 (write every file) when running several worker processes without sticky sessions
+    RECENT_AUDIO_MAX_BYTES = int(os.environ.get('RECENT_AUDIO_MAX_BYTES', 64 * 1024 * 1024)) # 64 MB
+    
+    # Offload audio file transfers to the front-end web server
+    # nginx: set to the internal location serving AUDIO_OUTPUT_DIR, e.g. '/_audio/' with
+    #   location /_audio/ { internal; alias /path/to/audio_output/; sendfile on; tcp_nopush on; }
+    AUDIO_ACCEL_REDIRECT_PREFIX = os.environ.get('AUDIO_ACCEL_REDIRECT_PREFIX')
+    # Apache (mod_xsendfile) / lighttpd: Flask's send_file emits X-Sendfile instead
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', 'False').lower() == 'true'
+    
+    # Response cache: reuse audio for repeated (text, voice) requests, persisted across restarts
+    AUDIO_CACHE_DIR = AUDIO_OUTPUT_DIR / 'cache'
+    AUDIO_CACHE_SIZE = int(os.environ.get('AUDIO_CACHE_SIZE', 512)) # Max cached entries (LFU eviction)
+    
     # Retention Policy (for cleanup_old_files)
     # 60 * 60 * 24 = 86400 seconds (1 day)
     # Set to a higher value or use an external scheduler in production
     AUDIO_RETENTION_TIME = int(os.environ.get('AUDIO_RETENTION_TIME_SECONDS', 86400)) # 1 day in seconds
+    # How often the background scheduler runs cleanup_old_files (0 disables it)
+    CLEANUP_INTERVAL_MINUTES = int(os.environ.get('CLEANUP_INTERVAL_MINUTES', 15))
     
     # 4. API & Text Processing Limits
     MAX_TEXT_LENGTH = int(os.environ.get('MAX_TEXT_LENGTH', 2000)) # Max characters for synthesis
@@ -62,6 +106,9 @@ class ProductionConfig(Config):
     # Ensure a strong secret key is always set in the environment
     SECRET_KEY = os.environ.get('SECRET_KEY')
     
+    # Warm up by default so no user request pays for model loading (WARMUP=0 to skip)
+    WARMUP_ON_START = os.environ.get('WARMUP', '1') == '1'
+    
     # 2. API Limits (Potentially more restrictive in high-volume production)
     # MAX_TEXT_LENGTH = 1000 # Example: if you need stricter limits
     
@@ -0,0 +1,47 @@
+"""
+Gunicorn configuration for production
+Run with: gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+
+# Load model weights once in the master so workers share them (see MODEL_PRELOAD in config.py)
+os.environ.setdefault('MODEL_PRELOAD', '1')
+# Warm up in post_worker_init only: import-time warm-up would run in the master too,
+# creating a CUDA context that forked workers can't use (and warming CPU twice)
+os.environ.setdefault('WARMUP', '0')
+# Workers don't share memory; without sticky sessions every audio file must be written to disk
+os.environ.setdefault('RECENT_AUDIO_MAX_BYTES', '0')
+
+_use_gpu = os.environ.get('USE_GPU', 'False').lower() == 'true'
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# Threaded workers: each request waits on the batch scheduler in its own thread,
+# so concurrent requests are decoded together and a long stream doesn't block the rest
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Model inference is CPU-bound, so the I/O-bound 2 * cores + 1 rule doesn't apply: every worker
+# runs generate() on its own torch thread pool and has its own batch scheduler
+# CPU: two workers sharing the preloaded weights, with the cores split between them (see
+#   post_worker_init). More workers overlap tokenization and encoding with generation, but each
+#   gets fewer torch threads and smaller batches, since traffic is split across more schedulers
+# GPU: one worker, since each worker holds its own model copy in VRAM and requests are batched anyway
+_cpu_count = os.cpu_count() or 1
+workers = int(os.environ.get('WEB_CONCURRENCY', 1 if _use_gpu else min(2, _cpu_count)))
+
+# Import app.py (and load the model) before forking
+preload_app = True
+
+# Long generations on CPU can take minutes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 300))
+keepalive = 5
+
+
+def post_worker_init(worker):
+    """Split the cores between workers, then warm up before accepting requests"""
+    import torch
+    torch.set_num_threads(max(1, _cpu_count // workers))
+    
+    from app import warmup_tts_engine
+    warmup_tts_engine()
@@ -238,6 +238,7 @@ EOF
         echo ""
         echo "  2. Run the application:"
         echo "     python app.py"
+        echo "     Production: gunicorn -c gunicorn.conf.py app:app"
         echo ""
         echo "  3. Open browser to:"
         echo "     http://localhost:5000"
@@ -0,0 +1,252 @@
+"""
+Unit tests for the Flask app that don't need the Bark model
+"""
+import json
+import tempfile
+import threading
+import time
+import unittest
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from unittest import mock
+import numpy as np
+from werkzeug.serving import make_server
+import app as app_module
+from utils.audio_cache import AudioCache
+from utils.audio_utils import AudioUtils
+from utils.tts_engine import TTSEngine
+
+
+class SlowScheduler:
+    """Resolves every request after a fixed delay instead of running a model"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def submit(self, text, voice_preset=None):
+        future = Future()
+        result = (np.zeros(10, dtype=np.float32), 24000)
+        threading.Timer(self.delay, future.set_result, args=(result,)).start()
+        return future
+
+    def infer(self, text, voice_preset=None, timeout=None):
+        return self.submit(text, voice_preset).result(timeout=timeout)
+
+
+class ManualScheduler:
+    """Hands out futures that the test resolves itself"""
+
+    def __init__(self):
+        self.submitted = []
+        self.futures = []
+
+    def submit(self, text, voice_preset=None):
+        future = Future()
+        self.submitted.append((text, voice_preset))
+        self.futures.append(future)
+        return future
+
+
+class FakeEngine:
+    """Encodes audio to a fixed placeholder"""
+
+    sample_rate = 24000
+    to_int16 = staticmethod(TTSEngine.to_int16)
+
+    def encode_audio(self, audio_array, sample_rate, audio_format='wav'):
+        return b'RIFF....WAVE', 'wav'
+
+
+class TestApp(unittest.TestCase):
+    """Test cases for the synthesis routes"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.root = Path(self.tmp_dir.name)
+
+        patches = [
+            mock.patch.dict(app_module.app.config, {'AUDIO_OUTPUT_DIR': root}),
+            mock.patch.object(app_module, 'RECENT_AUDIO', OrderedDict()),
+            mock.patch.object(app_module, '_recent_audio_bytes', 0),
+            mock.patch.object(app_module, 'get_batch_scheduler', return_value=SlowScheduler(0.5)),
+            mock.patch.object(app_module, 'get_tts_engine', return_value=FakeEngine()),
+            mock.patch.object(app_module, 'get_audio_cache', return_value=AudioCache(root / 'cache')),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+        self.server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def _post(self, path, payload):
+        request = urllib.request.Request(
+            f'http://127.0.0.1:{self.server.server_port}{path}',
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    def test_recent_audio_byte_budget(self):
+        """In-memory audio is bounded by total size; the oldest clips spill to disk"""
+        app_module.app.config['RECENT_AUDIO_MAX_BYTES'] = 10
+        app_module.remember_audio('first.wav', b'a' * 6)
+        app_module.remember_audio('second.wav', b'b' * 4)
+        self.assertIn('first.wav', app_module.RECENT_AUDIO)
+        self.assertFalse((self.root / 'first.wav').exists())
+
+        app_module.remember_audio('third.wav', b'c' * 4)
+        self.assertIsNone(app_module.recall_audio('first.wav'))
+        self.assertEqual((self.root / 'first.wav').read_bytes(), b'a' * 6)
+        self.assertEqual(app_module.recall_audio('third.wav'), b'c' * 4)
+
+        # A clip larger than the whole budget is written straight away
+        app_module.remember_audio('long.wav', b'd' * 20)
+        self.assertIsNone(app_module.recall_audio('long.wav'))
+        self.assertEqual((self.root / 'long.wav').read_bytes(), b'd' * 20)
+
+    def test_evicted_audio_served_while_spilling(self):
+        """Evicted audio stays servable until its file is completely written"""
+        app_module.app.config['RECENT_AUDIO_MAX_BYTES'] = 0
+        seen = []
+
+        def write_audio_file(filename, data):
+            # Mid-write: the file isn't there yet, but the bytes are still served
+            seen.append((app_module.recall_audio(filename), (self.root / filename).exists()))
+            real_write(filename, data)
+
+        real_write = app_module.write_audio_file
+        with mock.patch.object(app_module, 'write_audio_file', side_effect=write_audio_file):
+            app_module.remember_audio('clip.wav', b'audio')
+
+        self.assertEqual(seen, [(b'audio', False)])
+        self.assertIsNone(app_module.recall_audio('clip.wav'))
+        self.assertEqual((self.root / 'clip.wav').read_bytes(), b'audio')
+        self.assertEqual(list(self.root.glob('*.tmp')), [])
+
+    def test_unknown_voice_preset(self):
+        """Presets outside VOICES are rejected with 400 before reaching the model"""
+        with app_module.app.test_client() as client:
+            response = client.post('/api/synthesize', json={'text': 'Hello', 'voice_preset': '../../etc/passwd'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown voice preset', response.get_json()['error'])
+
+    def test_invalid_cache_options(self):
+        """A cache_options value that isn't an object is rejected with 400"""
+        with app_module.app.test_client() as client:
+            response = client.post('/api/synthesize', json={'text': 'Hello', 'cache_options': 'on'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_stream(self):
+        """The stream is a WAV header followed by each sentence's PCM, in order"""
+        scheduler = ManualScheduler()
+        with mock.patch.object(app_module, 'get_batch_scheduler', return_value=scheduler), \
+                app_module.app.test_client() as client:
+            response = client.post('/api/synthesize/stream', json={'text': 'One two. Three four.'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'audio/wav')
+            self.assertEqual(scheduler.submitted, [
+                ('One two.', app_module.app.config['STREAM_VOICE_PRESET']),
+                ('Three four.', app_module.app.config['STREAM_VOICE_PRESET']),
+            ])
+
+            # Resolved out of order; still sent in sentence order
+            scheduler.futures[1].set_result((np.array([0.5, -0.5], dtype=np.float32), 24000))
+            scheduler.futures[0].set_result((np.array([0.25], dtype=np.float32), 24000))
+            body = response.get_data()
+
+        self.assertEqual(body[:44], AudioUtils.wav_header(24000))
+        np.testing.assert_array_equal(np.frombuffer(body[44:], dtype=np.int16), [8191, 16383, -16383])
+
+    def test_stream_keeps_requested_preset(self):
+        """An explicit preset is used as is for every sentence"""
+        scheduler = ManualScheduler()
+        with mock.patch.object(app_module, 'get_batch_scheduler', return_value=scheduler), \
+                app_module.app.test_client() as client:
+            client.post('/api/synthesize/stream', json={'text': 'One. Two.', 'voice_preset': 'v2/en_speaker_1'})
+
+        self.assertEqual(
+            [voice_preset for _, voice_preset in scheduler.submitted],
+            ['v2/en_speaker_1', 'v2/en_speaker_1']
+        )
+
+    def test_stream_empty_text(self):
+        """Empty text is rejected with a JSON 400 before anything is streamed"""
+        with app_module.app.test_client() as client:
+            response = client.post('/api/synthesize/stream', json={'text': ''})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_stream_failure(self):
+        """A failed sentence ends the stream and cancels the sentences after it"""
+        scheduler = ManualScheduler()
+        with mock.patch.object(app_module, 'get_batch_scheduler', return_value=scheduler), \
+                app_module.app.test_client() as client:
+            response = client.post('/api/synthesize/stream', json={'text': 'One. Two. Three.'})
+            scheduler.futures[0].set_result((np.array([0.5], dtype=np.float32), 24000))
+            scheduler.futures[1].set_exception(RuntimeError("generation failed"))
+            body = response.get_data()
+
+        self.assertEqual(len(body), 44 + 2)
+        self.assertTrue(scheduler.futures[2].cancelled())
+
+    def test_audio_accel_redirect(self):
+        """Behind nginx, audio on disk is handed off with X-Accel-Redirect"""
+        (self.root / 'clip.wav').write_bytes(b'RIFF....WAVE')
+        app_module.app.config['AUDIO_ACCEL_REDIRECT_PREFIX'] = '/_audio/'
+
+        with app_module.app.test_client() as client:
+            response = client.get('/audio/clip.wav')
+
+        self.assertEqual(response.headers['X-Accel-Redirect'], '/_audio/clip.wav')
+        self.assertEqual(response.get_data(), b'')
+
+    def test_voices_etag(self):
+        """Voices are served with an ETag and revalidated with 304"""
+        with app_module.app.test_client() as client:
+            response = client.get('/api/voices')
+            etag = response.headers['ETag']
+            revalidated = client.get('/api/voices', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.get_data(), b'')
+
+    def test_concurrent_synthesis(self):
+        """Requests waiting on the model don't hold up each other"""
+        results = []
+
+        def synthesize(i):
+            results.append(self._post('/api/synthesize', {
+                'text': f'Hello number {i}',
+                'cache_options': {'enabled': 'off'}
+            }))
+
+        threads = [threading.Thread(target=synthesize, args=(i,)) for i in range(4)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result['success'] for result in results))
+        # Served one after another, four requests would take 2 s
+        self.assertLess(elapsed, 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Unit tests for AudioCache
+"""
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from utils.audio_cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+    """Test cases for AudioCache class"""
+    
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.cache_dir = self.root / 'cache'
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def _make_audio(self, name, data=b'RIFF....WAVE'):
+        path = self.root / name
+        path.write_bytes(data)
+        return path
+    
+    def test_make_key(self):
+        """Keys depend on both text and voice preset"""
+        key = AudioCache.make_key("Hello world", None)
+        self.assertEqual(key, AudioCache.make_key("Hello world", None))
+        self.assertNotEqual(key, AudioCache.make_key("Hello world", "v2/en_speaker_6"))
+        self.assertNotEqual(key, AudioCache.make_key("Hello there", None))
+    
+    def test_put_and_restore(self):
+        """A stored file can be materialized at a new path"""
+        cache = AudioCache(self.cache_dir)
+        key = AudioCache.make_key("Hello world")
+        self.assertIsNone(cache.get(key))
+        
+        cache.put(key, self._make_audio('first.wav', b'audio-bytes'))
+        cached_path = cache.get(key)
+        self.assertIsNotNone(cached_path)
+        
+        restored = self.root / 'second.wav'
+        AudioCache.restore(cached_path, restored)
+        self.assertEqual(restored.read_bytes(), b'audio-bytes')
+    
+    def test_restored_file_survives_rewrite(self):
+        """Re-caching a key doesn't change audio already restored from it"""
+        cache = AudioCache(self.cache_dir)
+        key = AudioCache.make_key("Hello world")
+        cache.put_data(key, b'AAAA-first-render', '.wav')
+        
+        served = self.root / 'served-1.wav'
+        AudioCache.restore(cache.get(key), served)
+        
+        # Another worker that missed the entry renders and stores the key again
+        AudioCache(self.cache_dir).put_data(key, b'BB', '.wav')
+        cache.put(key, self._make_audio('again.wav', b'CC'))
+        
+        self.assertEqual(served.read_bytes(), b'AAAA-first-render')
+        self.assertEqual(cache.get(key).read_bytes(), b'CC')
+        self.assertEqual(list(self.cache_dir.glob('*.tmp')), [])
+    
+    def test_put_data(self):
+        """Encoded bytes can be stored without a source file"""
+        cache = AudioCache(self.cache_dir)
+        key = AudioCache.make_key("Hello world")
+        cache.put_data(key, b'audio-bytes', '.wav')
+        
+        cached_path = cache.get(key)
+        self.assertEqual(cached_path.suffix, '.wav')
+        self.assertEqual(cached_path.read_bytes(), b'audio-bytes')
+    
+    def test_index_survives_restart(self):
+        """Entries are reloaded from the on-disk index"""
+        key = AudioCache.make_key("Hello world")
+        AudioCache(self.cache_dir).put(key, self._make_audio('first.wav'))
+        
+        self.assertIsNotNone(AudioCache(self.cache_dir).get(key))
+    
+    def test_index_shared_between_processes(self):
+        """Caches sharing a directory keep each other's index entries"""
+        first_key = AudioCache.make_key("first")
+        second_key = AudioCache.make_key("second")
+        first_cache = AudioCache(self.cache_dir)
+        second_cache = AudioCache(self.cache_dir)
+        
+        first_cache.put_data(first_key, b'first', '.wav')
+        second_cache.put_data(second_key, b'second', '.wav')
+        
+        restarted = AudioCache(self.cache_dir)
+        self.assertIsNotNone(restarted.get(first_key))
+        self.assertIsNotNone(restarted.get(second_key))
+    
+    def test_index_write_failure(self):
+        """A failed index write is logged and leaves no temp file behind"""
+        cache = AudioCache(self.cache_dir)
+        key = AudioCache.make_key("Hello world")
+        
+        real_replace = os.replace
+        
+        def replace(src, dst):
+            # Another worker's rename got there first
+            if Path(dst).name == AudioCache.INDEX_FILENAME:
+                raise FileNotFoundError(src)
+            real_replace(src, dst)
+        
+        with mock.patch('utils.audio_cache.os.replace', side_effect=replace):
+            cache.put_data(key, b'audio-bytes', '.wav')
+        
+        self.assertIsNotNone(cache.get(key))
+        self.assertEqual(list(self.cache_dir.glob('*.tmp')), [])
+    
+    def test_eviction_removes_file(self):
+        """Evicted entries have their cached file deleted"""
+        cache = AudioCache(self.cache_dir, maxsize=1)
+        first_key = AudioCache.make_key("first")
+        cache.put(first_key, self._make_audio('first.wav'))
+        first_path = cache.get(first_key)
+        
+        cache.put(AudioCache.make_key("second"), self._make_audio('second.wav'))
+        
+        self.assertIsNone(cache.get(first_key))
+        self.assertFalse(first_path.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for AudioUtils
+"""
+import io
+import unittest
+import wave
+import numpy as np
+from utils.audio_utils import AudioUtils
+
+
+class TestAudioUtils(unittest.TestCase):
+    """Test cases for AudioUtils class"""
+    
+    def test_wav_header(self):
+        """Test the 44-byte header readers see for fixed-length and streamed audio"""
+        pcm = np.arange(100, dtype=np.int16).tobytes()
+        header = AudioUtils.wav_header(24000, data_size=len(pcm))
+        self.assertEqual(len(header), 44)
+        
+        with wave.open(io.BytesIO(header + pcm)) as wav:
+            self.assertEqual(wav.getframerate(), 24000)
+            self.assertEqual(wav.getnchannels(), 1)
+            self.assertEqual(wav.getsampwidth(), 2)
+            self.assertEqual(wav.getnframes(), 100)
+        
+        # Unknown length: the data size is the largest value the RIFF size still fits
+        header = AudioUtils.wav_header(24000)
+        self.assertEqual(header[:4], b'RIFF')
+        self.assertEqual(int.from_bytes(header[4:8], 'little'), 0xFFFFFFFF)
+    
+    def test_float_to_int16(self):
+        """Test float to 16-bit PCM conversion"""
+        audio = np.array([0.0, 0.5, -0.5, 1.0, -1.0, 2.0, -2.0], dtype=np.float32)
+        result = AudioUtils.float_to_int16(audio)
+        
+        self.assertEqual(result.dtype, np.int16)
+        np.testing.assert_array_equal(result, [0, 16383, -16383, 32767, -32767, 32767, -32767])
+        
+        # Matches the plain NumPy conversion, whatever the layout
+        audio = np.random.default_rng(0).uniform(-1.5, 1.5, (2, 500))
+        expected = (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+        np.testing.assert_array_equal(AudioUtils.float_to_int16(audio), expected)
+        np.testing.assert_array_equal(AudioUtils.float_to_int16(audio.T), expected.T)
+    
+    def test_normalize_audio(self):
+        """Test RMS normalization"""
+        audio = np.full(1000, 0.01, dtype=np.float64)
+        result = AudioUtils.normalize_audio(audio, target_level=-20.0)
+        
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(result, 0.1, rtol=1e-5)
+        
+        # Loud input is clipped to [-1, 1]
+        result = AudioUtils.normalize_audio(np.array([0.5, -0.01, 0.01]), target_level=0.0)
+        self.assertLessEqual(np.max(np.abs(result)), 1.0)
+        
+        # Silence is returned unchanged
+        result = AudioUtils.normalize_audio(np.zeros(10))
+        np.testing.assert_array_equal(result, 0.0)
+    
+    def test_normalize_audio_out(self):
+        """Test normalizing into a preallocated buffer"""
+        audio = np.full(1000, 0.01, dtype=np.float32)
+        out = np.empty_like(audio)
+        result = AudioUtils.normalize_audio(audio, target_level=-20.0, out=out)
+        
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, 0.1, rtol=1e-5)
+        np.testing.assert_array_equal(audio, 0.01)
+        
+        # In place
+        result = AudioUtils.normalize_audio(audio, target_level=-20.0, out=audio)
+        self.assertIs(result, audio)
+        np.testing.assert_allclose(audio, 0.1, rtol=1e-5)
+    
+    def test_convert_sample_rate(self):
+        """Test resampling changes length by the rate ratio"""
+        audio = np.sin(np.linspace(0, 100, 24000)).astype(np.float32)
+        
+        result = AudioUtils.convert_sample_rate(audio, 24000, 16000)
+        self.assertEqual(len(result), 16000)
+        
+        # Multi-channel audio is (channels, samples), resampled along the last axis
+        stereo = np.stack([audio, -audio])
+        result = AudioUtils.convert_sample_rate(stereo, 24000, 16000)
+        self.assertEqual(result.shape, (2, 16000))
+        np.testing.assert_allclose(result[1], -result[0], atol=1e-6)
+        
+        # Same rate is a no-op
+        self.assertIs(AudioUtils.convert_sample_rate(audio, 24000, 24000), audio)
+    
+    def test_add_fade(self):
+        """Test fade in/out ramps"""
+        audio = np.ones(100, dtype=np.float32)
+        result = AudioUtils.add_fade(audio, sample_rate=100, fade_in_duration=0.1, fade_out_duration=0.1)
+        
+        np.testing.assert_allclose(result[:10], np.arange(10) / 10, rtol=1e-6)
+        np.testing.assert_allclose(result[-10:], 1.0 - np.arange(10) / 10, rtol=1e-6)
+        np.testing.assert_array_equal(result[10:-10], 1.0)
+        self.assertEqual(result.dtype, np.float32)
+        
+        # Original is untouched by default
+        np.testing.assert_array_equal(audio, 1.0)
+        
+        # Cached ramps are not affected by earlier results
+        again = AudioUtils.add_fade(np.ones(100, dtype=np.float32), sample_rate=100)
+        np.testing.assert_array_equal(again, result)
+    
+    def test_add_fade_inplace(self):
+        """Test in-place fading"""
+        audio = np.ones(100, dtype=np.float32)
+        result = AudioUtils.add_fade(audio, sample_rate=100, inplace=True)
+        
+        self.assertIs(result, audio)
+        self.assertEqual(audio[0], 0.0)
+    
+    def test_add_fade_short_audio(self):
+        """Fades never cover more than half the audio each"""
+        audio = np.ones(4, dtype=np.float64)
+        result = AudioUtils.add_fade(audio, sample_rate=24000)
+        
+        np.testing.assert_allclose(result, [0.0, 0.5, 1.0, 0.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
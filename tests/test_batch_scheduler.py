@@ -0,0 +1,100 @@
+"""
+Unit tests for BatchScheduler
+"""
+import threading
+import unittest
+from utils.batch_scheduler import BatchScheduler
+
+
+class FakeEngine:
+    """Records the batches it receives instead of running a model"""
+    
+    def __init__(self, fail=False, bad_presets=()):
+        self.batches = []
+        self.fail = fail
+        self.bad_presets = set(bad_presets)
+        self.release = threading.Event()
+    
+    def text_to_speech_batch(self, texts, voice_presets):
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("generation failed")
+        return [
+            ValueError("bad preset") if voice_preset in self.bad_presets else (text.upper(), 24000)
+            for text, voice_preset in zip(texts, voice_presets)
+        ]
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """Test cases for BatchScheduler class"""
+    
+    def test_infer_returns_own_result(self):
+        """Each caller gets the slice of the batch that matches its request"""
+        engine = FakeEngine()
+        engine.release.set()
+        scheduler = BatchScheduler(engine, max_batch_size=4, batch_wait_timeout_s=0.01)
+        
+        self.assertEqual(scheduler.infer("hello"), ("HELLO", 24000))
+        scheduler.close()
+    
+    def test_concurrent_requests_are_batched(self):
+        """Requests queued while the engine is busy are decoded together"""
+        engine = FakeEngine()
+        scheduler = BatchScheduler(engine, max_batch_size=4, batch_wait_timeout_s=0.01)
+        
+        # The first request occupies the engine while the rest queue up
+        first = scheduler.submit("first")
+        while not first.running():
+            pass
+        futures = [scheduler.submit(f"text {i}") for i in range(3)]
+        engine.release.set()
+        
+        self.assertEqual(first.result(timeout=5), ("FIRST", 24000))
+        results = [future.result(timeout=5) for future in futures]
+        self.assertEqual(results, [(f"TEXT {i}", 24000) for i in range(3)])
+        self.assertEqual(engine.batches[1], ["text 0", "text 1", "text 2"])
+        scheduler.close()
+    
+    def test_batch_respects_max_size(self):
+        """No batch is larger than max_batch_size"""
+        engine = FakeEngine()
+        scheduler = BatchScheduler(engine, max_batch_size=2, batch_wait_timeout_s=0.01)
+        
+        futures = [scheduler.submit(f"text {i}") for i in range(5)]
+        engine.release.set()
+        for future in futures:
+            future.result(timeout=5)
+        
+        self.assertTrue(all(len(batch) <= 2 for batch in engine.batches))
+        scheduler.close()
+    
+    def test_engine_error_propagates(self):
+        """An engine failure is raised to every caller in the batch"""
+        engine = FakeEngine(fail=True)
+        engine.release.set()
+        scheduler = BatchScheduler(engine, max_batch_size=4, batch_wait_timeout_s=0.01)
+        
+        with self.assertRaises(RuntimeError):
+            scheduler.infer("hello")
+        scheduler.close()
+
+    
+    def test_item_error_fails_only_its_request(self):
+        """A request the engine fails doesn't fail the rest of its batch"""
+        engine = FakeEngine(bad_presets=["bogus"])
+        scheduler = BatchScheduler(engine, max_batch_size=4, batch_wait_timeout_s=0.05)
+        
+        good = scheduler.submit("Hello there")
+        bad = scheduler.submit("Hi", voice_preset="bogus")
+        engine.release.set()
+        
+        self.assertEqual(good.result(timeout=5), ("HELLO THERE", 24000))
+        with self.assertRaises(ValueError):
+            bad.result(timeout=5)
+        self.assertEqual(engine.batches, [["Hello there", "Hi"]])
+        scheduler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
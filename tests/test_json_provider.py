@@ -0,0 +1,41 @@
+"""
+Unit tests for ORJSONProvider
+"""
+import unittest
+from datetime import datetime
+import numpy as np
+from flask import Flask, jsonify
+from utils.json_provider import ORJSONProvider
+
+
+class TestORJSONProvider(unittest.TestCase):
+    """Test cases for ORJSONProvider class"""
+    
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.json = ORJSONProvider(self.app)
+    
+    def test_jsonify(self):
+        """Responses round-trip through jsonify and get_json"""
+        with self.app.test_request_context():
+            response = jsonify({'success': True, 'voices': [{'id': None}]})
+        
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertEqual(response.get_json(), {'success': True, 'voices': [{'id': None}]})
+    
+    def test_native_types(self):
+        """numpy values and datetimes serialize without conversion"""
+        result = self.app.json.dumps({
+            'duration': np.float32(1.5),
+            'samples': np.arange(3),
+            'timestamp': datetime(2024, 1, 1)
+        })
+        
+        self.assertEqual(
+            self.app.json.loads(result),
+            {'duration': 1.5, 'samples': [0, 1, 2], 'timestamp': '2024-01-01T00:00:00'}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@
 Unit tests for TextProcessor
 """
 import unittest
-from utils.text_processor import TextProcessor
+from unittest import mock
+from utils.text_processor import TextProcessor, _preprocess_cleaned
 
 
 class TestTextProcessor(unittest.TestCase):
@@ -14,6 +15,10 @@ class TestTextProcessor(unittest.TestCase):
         result = TextProcessor.clean_text("  Hello   world  ")
         self.assertEqual(result, "Hello world")
         
+        # Tabs, newlines and other whitespace runs collapse to one space
+        result = TextProcessor.clean_text("\tHello\n\n world\r\n\u00a0again ")
+        self.assertEqual(result, "Hello world again")
+        
         # Test empty text
         result = TextProcessor.clean_text("")
         self.assertEqual(result, "")
@@ -33,6 +38,51 @@ class TestTextProcessor(unittest.TestCase):
         result = TextProcessor.expand_abbreviations("e.g. example")
         self.assertEqual(result, "for example example")
     
+    def test_expand_abbreviations_matching(self):
+        """Test the precompiled pattern's longest-first, whole-word matching"""
+        # Longer abbreviations win over their prefixes
+        self.assertEqual(TextProcessor.expand_abbreviations("Sept. Mrs. vs. v."), "September Missus versus versus")
+        self.assertEqual(TextProcessor.expand_abbreviations("cats vs dogs"), "cats versus dogs")
+        
+        # Text without any candidate is returned as is
+        text = "Hello world"
+        self.assertIs(TextProcessor.expand_abbreviations(text), text)
+        
+        # Abbreviations inside words are left alone
+        self.assertEqual(TextProcessor.expand_abbreviations("Dover very vast"), "Dover very vast")
+        self.assertEqual(TextProcessor.expand_abbreviations("PhDr. Smith"), "PhDr. Smith")
+        
+        # Every abbreviation expands on its own
+        for abbrev, expansion in TextProcessor.ABBREVIATIONS.items():
+            self.assertEqual(TextProcessor.expand_abbreviations(f"x {abbrev} y"), f"x {expansion} y")
+    
+    @unittest.skipIf(TextProcessor._ABBREV_AUTOMATON is None, "pyahocorasick not installed")
+    def test_automaton_matches_regex(self):
+        """The Aho-Corasick path expands exactly like the regex"""
+        texts = [
+            "Dr. Smith vs. Mr. Jones, e.g. on Main St. at approx. noon",
+            "vs.x v.v vsvs _vs. Dr.Dr. Sept.Sep. No. no. No.",
+            "Dover very vast PhDr. Smith",
+            "v",
+            "",
+        ]
+        for text in texts:
+            expected = TextProcessor._ABBREV_PATTERN.sub(
+                lambda match: TextProcessor.ABBREVIATIONS[match.group(1)], text
+            )
+            self.assertEqual(TextProcessor._expand_with_automaton(text), expected)
+    
+    def test_split_sentences(self):
+        """Test sentence splitting"""
+        result = TextProcessor.split_sentences("Hello there. How are you? Great!")
+        self.assertEqual(result, ["Hello there.", "How are you?", "Great!"])
+        
+        # Trailing text without punctuation is kept
+        result = TextProcessor.split_sentences("First one... second one")
+        self.assertEqual(result, ["First one...", "second one"])
+        
+        self.assertEqual(TextProcessor.split_sentences(""), [])
+    
     def test_validate_text(self):
         """Test text validation"""
         # Valid text
@@ -55,6 +105,14 @@ class TestTextProcessor(unittest.TestCase):
         is_valid, msg = TextProcessor.validate_text(long_text, max_length=500)
         self.assertFalse(is_valid)
         self.assertIsNotNone(msg)
+        
+        # Length is measured after whitespace is collapsed
+        is_valid, _ = TextProcessor.validate_text("  ab \n\t cd  ", max_length=5)
+        self.assertTrue(is_valid)
+        is_valid, _ = TextProcessor.validate_text("  ab \n\t cd  ", max_length=4)
+        self.assertFalse(is_valid)
+        is_valid, _ = TextProcessor.validate_text(" \n ")
+        self.assertFalse(is_valid)
     
     def test_preprocess_for_tts(self):
         """Test complete preprocessing pipeline"""
@@ -65,6 +123,50 @@ class TestTextProcessor(unittest.TestCase):
         long_text = "a" * 600
         result = TextProcessor.preprocess_for_tts(long_text, max_length=500)
         self.assertEqual(len(result), 500)
+        
+        # Truncation prefers a word boundary close to the limit
+        truncated = TextProcessor.preprocess_for_tts("word " * 30, max_length=52)
+        self.assertEqual(truncated, "word " * 9 + "word")
+        
+        # Repeated prompts are served from the cache, keyed on max_length too
+        self.assertEqual(TextProcessor.preprocess_for_tts(long_text, max_length=500), result)
+        self.assertEqual(len(TextProcessor.preprocess_for_tts(long_text, max_length=400)), 400)
+        
+        # Expansions never need a second whitespace pass
+        for abbrev, expansion in TextProcessor.ABBREVIATIONS.items():
+            self.assertEqual(expansion, TextProcessor.clean_text(expansion))
+            self.assertEqual(TextProcessor.preprocess_for_tts(f" a \t{abbrev}\n b "), f"a {expansion} b")
+        
+        # Non-string input is converted first
+        self.assertEqual(TextProcessor.preprocess_for_tts(12345), "12345")
+    
+    def test_validate_and_preprocess(self):
+        """Test combined validation and preprocessing"""
+        is_valid, msg, result = TextProcessor.validate_and_preprocess("  Dr.   Smith said hello  ")
+        self.assertTrue(is_valid)
+        self.assertIsNone(msg)
+        self.assertEqual(result, "Doctor Smith said hello")
+        
+        # Matches the two-step pipeline
+        text = "Mr. Jones\tvs.\n\nMs. Smith, e.g. on Main St. at approx. noon"
+        _, _, result = TextProcessor.validate_and_preprocess(text)
+        self.assertEqual(result, TextProcessor.preprocess_for_tts(text))
+        
+        # The memoized step is keyed on cleaned text: differently spaced prompts share an entry
+        # and the validated path reuses its cleaned string instead of cleaning again
+        with mock.patch.object(TextProcessor, 'clean_text', wraps=TextProcessor.clean_text) as clean_text:
+            TextProcessor.validate_and_preprocess("Dr.  Who   is here")
+        self.assertEqual(clean_text.call_count, 1)
+        hits = _preprocess_cleaned.cache_info().hits
+        TextProcessor.preprocess_for_tts(" Dr. Who\tis  here ")
+        self.assertEqual(_preprocess_cleaned.cache_info().hits, hits + 1)
+        
+        # Invalid input returns no text
+        for text in ("", "   ", "Hi", "a" * 501):
+            is_valid, msg, result = TextProcessor.validate_and_preprocess(text, max_length=500)
+            self.assertFalse(is_valid)
+            self.assertIsNotNone(msg)
+            self.assertIsNone(result)
     
     def test_estimate_duration(self):
         """Test duration estimation"""
@@ -72,6 +174,10 @@ class TestTextProcessor(unittest.TestCase):
         duration = TextProcessor.estimate_duration(text, words_per_minute=150)
         self.assertIsInstance(duration, float)
         self.assertGreater(duration, 0)
+        
+        # Extra whitespace doesn't change the word count
+        self.assertEqual(TextProcessor.estimate_duration("  one \n two\tthree  ", words_per_minute=60), 3.0)
+        self.assertEqual(TextProcessor.estimate_duration("   "), 0.0)
 
 
 if __name__ == '__main__':
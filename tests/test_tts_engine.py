@@ -0,0 +1,185 @@
+"""
+Unit tests for TTSEngine helpers that don't need the Bark model
+"""
+import threading
+import unittest
+from types import SimpleNamespace
+import numpy as np
+import torch
+from cachetools import LFUCache
+from utils.tts_engine import TTSEngine
+
+
+class FakeTensor:
+    """Stands in for tensors and BatchFeatures: records the device it was moved to"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.device = None
+    
+    def to(self, device):
+        self.device = device
+        return self
+
+
+class FakeProcessor:
+    """Records calls instead of tokenizing text and loading voice presets"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __call__(self, texts, voice_preset=None, return_tensors=None):
+        self.calls.append((texts, voice_preset))
+        if voice_preset == "bogus":
+            raise ValueError("bad preset")
+        inputs = {'input_ids': FakeTensor('input_ids')}
+        if voice_preset is not None:
+            inputs['history_prompt'] = FakeTensor(voice_preset)
+        return inputs
+
+
+class FakeModel:
+    """Returns padded audio and a list of output lengths, like BarkModel.generate"""
+    
+    def __init__(self, audio, output_lengths, sample_rate=24000):
+        self.audio = audio
+        self.output_lengths = output_lengths
+        self.generation_config = SimpleNamespace(sample_rate=sample_rate)
+        self.calls = []
+    
+    def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return torch.tensor(self.audio), list(self.output_lengths)
+
+
+def make_engine(voice_prompt_cache_size=4):
+    """Build a TTSEngine around a fake processor, skipping model loading"""
+    engine = TTSEngine.__new__(TTSEngine)
+    engine.device = 'cpu'
+    engine.processor = FakeProcessor()
+    engine._voice_prompts = LFUCache(maxsize=voice_prompt_cache_size) if voice_prompt_cache_size > 0 else None
+    engine._voice_prompts_lock = threading.Lock()
+    return engine
+
+
+class TestTTSEngine(unittest.TestCase):
+    """Test cases for TTSEngine class"""
+    
+    def test_voice_prompt_loaded_once(self):
+        """A voice preset is loaded on first use and reused afterwards"""
+        engine = make_engine()
+        
+        first = engine._prepare_inputs(["One."], "v2/en_speaker_6")
+        second = engine._prepare_inputs(["Two.", "Three."], "v2/en_speaker_6")
+        
+        self.assertIs(first['history_prompt'], second['history_prompt'])
+        self.assertEqual(first['history_prompt'].device, 'cpu')
+        
+        # One preset load; the texts themselves are tokenized without the preset
+        preset_loads = [call for call in engine.processor.calls if call[1] is not None]
+        self.assertEqual(len(preset_loads), 1)
+        self.assertIn((["Two.", "Three."], None), engine.processor.calls)
+    
+    def test_voice_prompt_cache_disabled(self):
+        """With the cache disabled the processor loads the preset every time"""
+        engine = make_engine(voice_prompt_cache_size=0)
+        
+        engine._prepare_inputs(["One."], "v2/en_speaker_6")
+        engine._prepare_inputs(["Two."], "v2/en_speaker_6")
+        
+        self.assertEqual(engine.processor.calls, [
+            (["One."], "v2/en_speaker_6"),
+            (["Two."], "v2/en_speaker_6"),
+        ])
+    
+    def test_no_voice_preset(self):
+        """Requests without a preset carry no history prompt"""
+        engine = make_engine()
+        
+        inputs = engine._prepare_inputs(["Hello."])
+        
+        self.assertNotIn('history_prompt', inputs)
+        self.assertEqual(engine.processor.calls, [(["Hello."], None)])
+    
+    def test_generate_batch_strips_padding(self):
+        """Each row of a batch is cut to its own output length"""
+        engine = make_engine()
+        engine.model = FakeModel([[0.1, 0.2, 0.0], [0.3, 0.4, 0.5]], [2, 3])
+        
+        audio_arrays, sample_rate = engine._finish_batch(engine._start_batch(["One.", "Two."]))
+        
+        self.assertEqual(sample_rate, 24000)
+        self.assertEqual(len(audio_arrays), 2)
+        np.testing.assert_allclose(audio_arrays[0], [0.1, 0.2])
+        np.testing.assert_allclose(audio_arrays[1], [0.3, 0.4, 0.5])
+        self.assertTrue(engine.model.calls[0]['return_output_lengths'])
+    
+    def test_generate_speech(self):
+        """A single generation goes through the batched path as a batch of one"""
+        engine = make_engine()
+        engine.model = FakeModel([[0.1, 0.2, 0.0]], [2])
+        
+        audio_array, sample_rate = engine.generate_speech("Hello")
+        
+        self.assertEqual(sample_rate, 24000)
+        np.testing.assert_allclose(audio_array, [0.1, 0.2])
+        self.assertEqual(engine.processor.calls, [(["Hello."], None)])
+        
+        # The path /api/test and the warm-up take
+        audio_data, audio_format = engine.text_to_speech_bytes("Hello")
+        self.assertEqual(audio_format, 'wav')
+        self.assertEqual(audio_data[:4], b'RIFF')
+    
+    def test_generate_long_speech(self):
+        """Chunks of long text are generated together and concatenated"""
+        engine = make_engine()
+        engine.model = FakeModel([[0.1, 0.2, 0.0], [0.3, 0.4, 0.5]], [2, 3])
+        sentence = " ".join(["word"] * 40) + "."
+        
+        audio_array, _ = engine.generate_speech(f"{sentence} {sentence}")
+        
+        np.testing.assert_allclose(audio_array, [0.1, 0.2, 0.3, 0.4, 0.5])
+        self.assertEqual(engine.processor.calls, [([sentence, sentence], None)])
+    
+    def test_batch_error_stays_in_its_group(self):
+        """A preset that fails to load fails only the requests that asked for it"""
+        engine = make_engine()
+        engine.model = FakeModel([[0.1, 0.2, 0.0]], [2])
+        
+        results = engine.text_to_speech_batch(["Hello there", "Hi"], [None, "bogus"])
+        
+        np.testing.assert_allclose(results[0][0], [0.1, 0.2])
+        self.assertIsInstance(results[1], ValueError)
+    
+    def test_split_text(self):
+        """Test sentence-based chunking"""
+        engine = make_engine()
+        
+        chunks = engine.split_text("One two. Three four! Five six? Seven.", max_chunk_length=20)
+        self.assertEqual(chunks, ["One two. Three four.", "Five six. Seven."])
+        
+        # Runs of terminal punctuation end a single sentence
+        chunks = engine.split_text("Wait!? Really... Yes.", max_chunk_length=250)
+        self.assertEqual(chunks, ["Wait. Really. Yes."])
+        
+        # A sentence longer than the limit gets a chunk of its own
+        chunks = engine.split_text("Short. " + "x" * 30 + ". End.", max_chunk_length=20)
+        self.assertEqual(chunks, ["Short.", "x" * 30 + ".", "End."])
+    
+    def test_to_pcm16(self):
+        """Audio of any shape becomes 1-D int16"""
+        audio = np.array([[0.0, 0.5], [-0.5, 2.0]], dtype=np.float32)
+        result = TTSEngine.to_pcm16(audio)
+        
+        self.assertEqual(result.dtype, np.int16)
+        np.testing.assert_array_equal(result, [0, 16383, -16383, 32767])
+        
+        # Contiguous int16 input is not copied
+        pcm = np.array([[1, 2], [3, 4]], dtype=np.int16)
+        result = TTSEngine.to_pcm16(pcm)
+        self.assertEqual(result.shape, (4,))
+        self.assertTrue(np.shares_memory(result, pcm))
+
+
+if __name__ == '__main__':
+    unittest.main()
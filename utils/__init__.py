@@ -5,5 +5,8 @@ Contains text processing and TTS engine modules
 
 from .text_processor import TextProcessor
 from .tts_engine import TTSEngine
+from .batch_scheduler import BatchScheduler
+from .audio_cache import AudioCache
+from .json_provider import ORJSONProvider
 
-__all__ = ['TextProcessor', 'TTSEngine']
\ No newline at end of file
+__all__ = ['TextProcessor', 'TTSEngine', 'BatchScheduler', 'AudioCache', 'ORJSONProvider']
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Audio Cache Module - Reuses rendered audio for repeated (text, voice) requests
+"""
+from cachetools import Cache, LFUCache
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _FileLFUCache(LFUCache):
+    """LFU cache of key -> Path that deletes a file once its entry is evicted"""
+
+    def popitem(self):
+        key, path = super().popitem()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return key, path
+
+
+class AudioCache:
+    """
+    Persistent LFU cache of synthesized audio files
+    Keyed on the processed text and voice preset so repeat prompts skip the model
+    """
+
+    # Allowed values for the request's cache_options.enabled
+    MODES = ('on', 'read_only', 'off')
+
+    INDEX_FILENAME = 'index.json'
+
+    def __init__(self, cache_dir, maxsize=512):
+        """
+        Initialize the cache and restore entries saved by a previous run
+
+        Args:
+            cache_dir: Directory holding cached audio files and the index
+            maxsize: Maximum number of cached entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.cache_dir / self.INDEX_FILENAME
+
+        self._lock = threading.Lock()
+        self._cache = _FileLFUCache(maxsize=maxsize)
+        self._load_index()
+
+    @staticmethod
+    def make_key(text, voice_preset=None):
+        """
+        Build the cache key for a request
+
+        Args:
+            text: Processed text
+            voice_preset: Voice preset (None for the default voice)
+
+        Returns:
+            Hex digest string
+        """
+        return hashlib.blake2b(
+            f"{text}|{voice_preset}".encode(),
+            digest_size=16
+        ).hexdigest()
+
+    def get(self, key):
+        """
+        Look up a cached audio file
+
+        Args:
+            key: Cache key from make_key()
+
+        Returns:
+            Path to the cached file, or None on a miss
+        """
+        with self._lock:
+            path = self._cache.get(key)
+            if path is not None and not path.exists():
+                # File was removed behind our back; forget the entry
+                del self._cache[key]
+                self._save_index()
+                return None
+            return path
+
+    def put(self, key, audio_path):
+        """
+        Store a copy of a freshly generated audio file
+
+        Args:
+            key: Cache key from make_key()
+            audio_path: Path to the generated audio file
+        """
+        audio_path = Path(audio_path)
+        cached_path = self.cache_dir / f"{key}{audio_path.suffix}"
+
+        def copy(f):
+            with open(audio_path, 'rb') as source:
+                shutil.copyfileobj(source, f)
+
+        try:
+            self._write_file(cached_path, copy)
+        except OSError as e:
+            logger.warning(f"Could not cache audio file: {e}")
+            return
+
+        self._add(key, cached_path)
+
+    def put_data(self, key, data, suffix):
+        """
+        Store already-encoded audio bytes
+
+        Args:
+            key: Cache key from make_key()
+            data: Encoded audio bytes
+            suffix: File extension including the dot (e.g. '.wav')
+        """
+        cached_path = self.cache_dir / f"{key}{suffix}"
+
+        try:
+            self._write_file(cached_path, lambda f: f.write(data))
+        except OSError as e:
+            logger.warning(f"Could not cache audio data: {e}")
+            return
+
+        self._add(key, cached_path)
+
+    def _write_file(self, cached_path, write):
+        """
+        Write a cache file through a temp file and os.replace
+
+        Served audio files are hard links to cache files (see restore()), so a
+        cache file is never rewritten in place: links already handed out keep the old inode
+
+        Args:
+            cached_path: Final path of the cache file
+            write: Callable writing the contents to a binary file object
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{cached_path.stem}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            # mkstemp creates owner-only files; the front-end server reads these via X-Accel-Redirect
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, cached_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _add(self, key, cached_path):
+        """Register a cached file and persist the index"""
+        with self._lock:
+            self._cache[key] = cached_path
+            self._save_index()
+
+    @staticmethod
+    def restore(cached_path, audio_path):
+        """
+        Materialize a cached file at a new path (hard link, or copy if linking fails)
+
+        Args:
+            cached_path: Path returned by get()
+            audio_path: Destination path
+        """
+        try:
+            os.link(cached_path, audio_path)
+        except OSError:
+            shutil.copyfile(cached_path, audio_path)
+        # Fresh mtime so cleanup_old_files measures age from this request
+        os.utime(audio_path)
+
+    def _read_index(self):
+        """
+        Read the on-disk index
+
+        Returns:
+            Dict of key -> filename (empty if missing or unreadable)
+        """
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            return json.loads(self.index_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable audio cache index: {e}")
+            return {}
+
+    def _load_index(self):
+        """Restore entries from the on-disk index, skipping files that no longer exist"""
+        for key, filename in self._read_index().items():
+            path = self.cache_dir / filename
+            if path.exists():
+                self._cache[key] = path
+
+        logger.info(f"Loaded {len(self._cache)} cached audio entries")
+
+    def _save_index(self):
+        """
+        Write the key -> filename mapping so the cache survives restarts
+
+        Worker processes share the index, so entries written by others are kept
+        as long as their files exist. A failed write is logged, never raised:
+        the audio itself is already cached
+        """
+        index = {
+            key: filename for key, filename in self._read_index().items()
+            if (self.cache_dir / filename).exists()
+        }
+        # Read through Cache.__getitem__ so saving doesn't bump LFU counts
+        index.update({key: Cache.__getitem__(self._cache, key).name for key in self._cache})
+
+        # A temp file per write, so concurrent writers never replace each other's file
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='index.', suffix='.tmp')
+        except OSError as e:
+            logger.warning(f"Could not save audio cache index: {e}")
+            return
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not save audio cache index: {e}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -5,10 +5,39 @@ Helper functions for audio file manipulation
 import soundfile as sf
 import numpy as np
 from pathlib import Path
+from functools import lru_cache
 import logging
+import math
+import struct
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True)
+    def _float_to_int16_kernel(audio, out):
+        """Clip, scale and cast in one loop (LLVM vectorizes it), no float temporaries"""
+        for i in range(audio.size):
+            out[i] = np.int16(min(max(audio[i], -1.0), 1.0) * 32767.0)
+
+
+@lru_cache(maxsize=32)
+def _fade_ramp(num_samples, dtype, fade_in):
+    """
+    Build (once) a read-only linear fade ramp
+    
+    Fades use the same few lengths over and over (duration * sample rate),
+    so the ramps are shared between calls instead of reallocated each time
+    """
+    start, stop = (0.0, 1.0) if fade_in else (1.0, 0.0)
+    ramp = np.linspace(start, stop, num_samples, endpoint=False, dtype=dtype)
+    ramp.setflags(write=False)
+    return ramp
+
 class AudioUtils:
     """Audio processing utilities"""
     
@@ -45,30 +74,95 @@ class AudioUtils:
             return None
     
     @staticmethod
-    def normalize_audio(audio_array, target_level=-20.0):
+    def wav_header(sample_rate, num_channels=1, bits_per_sample=16, data_size=None):
+        """
+        Build a 44-byte PCM WAV header
+        
+        Args:
+            sample_rate: Sample rate in Hz
+            num_channels: Number of channels
+            bits_per_sample: Bits per sample
+            data_size: Size of the PCM data in bytes (None for an unknown-length stream)
+        
+        Returns:
+            Header bytes
+        """
+        # Streams don't know their length up front; players treat the max value as "until EOF"
+        if data_size is None:
+            data_size = 0xFFFFFFFF - 36
+        
+        block_align = num_channels * bits_per_sample // 8
+        
+        return struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', data_size + 36, b'WAVE',
+            b'fmt ', 16, 1, num_channels, sample_rate,
+            sample_rate * block_align, block_align, bits_per_sample,
+            b'data', data_size
+        )
+    
+    @staticmethod
+    def float_to_int16(audio_array):
+        """
+        Convert float audio in [-1, 1] to 16-bit PCM (out-of-range samples are clipped)
+        
+        Uses a single fused numba loop when numba is installed, otherwise NumPy
+        
+        Args:
+            audio_array: float32 or float64 audio data
+        
+        Returns:
+            int16 numpy array of the same shape
+        """
+        pcm = np.empty(audio_array.shape, dtype=np.int16)
+        
+        if NUMBA_AVAILABLE:
+            _float_to_int16_kernel(np.ascontiguousarray(audio_array).reshape(-1), pcm.reshape(-1))
+            return pcm
+        
+        clipped = np.clip(audio_array, -1.0, 1.0)
+        # Scale straight into the int16 buffer (truncates like astype)
+        np.multiply(clipped, 32767.0, out=pcm, casting='unsafe')
+        return pcm
+    
+    @staticmethod
+    def normalize_audio(audio_array, target_level=-20.0, out=None):
         """
         Normalize audio to target dB level
         
         Args:
             audio_array: Audio data as numpy array
             target_level: Target level in dB
+            out: Optional preallocated float32 array to write into (may be audio_array itself)
             
         Returns:
-            Normalized audio array
+            Normalized audio array (float32)
         """
         try:
-            # Calculate current RMS
-            rms = np.sqrt(np.mean(audio_array**2))
+            # Work in float32: half the memory traffic of float64 and plenty for audio
+            audio = np.asarray(audio_array, dtype=np.float32)
+            
+            if audio.size == 0:
+                return audio if out is None else out
+            
+            # Calculate current RMS with a single dot product (no squared temporary)
+            flat = audio.reshape(-1)
+            rms = math.sqrt(float(flat @ flat) / flat.size)
+            
+            # Silence has no level to scale from
+            if rms == 0:
+                if out is None:
+                    return audio.copy()
+                np.copyto(out, audio)
+                return out
             
             # Calculate scaling factor
-            current_db = 20 * np.log10(rms) if rms > 0 else -np.inf
+            current_db = 20 * math.log10(rms)
             scale = 10**((target_level - current_db) / 20)
             
-            # Apply normalization
-            normalized = audio_array * scale
-            
-            # Clip to prevent distortion
-            normalized = np.clip(normalized, -1.0, 1.0)
+            # Apply normalization and clip to prevent distortion, in one output buffer
+            normalized = np.multiply(audio, np.float32(scale), out=out)
+            np.clip(normalized, -1.0, 1.0, out=normalized)
             
             return normalized
             
@@ -81,8 +175,11 @@ class AudioUtils:
         """
         Convert audio to different sample rate
         
+        NumPy audio is resampled with libsoxr; torch tensors use torchaudio
+        so audio still on the GPU stays there
+        
         Args:
-            audio_array: Audio data
+            audio_array: Audio data (numpy array or torch tensor)
             orig_sr: Original sample rate
             target_sr: Target sample rate
             
@@ -90,18 +187,26 @@ class AudioUtils:
             Resampled audio array
         """
         try:
-            import librosa
-            
             if orig_sr == target_sr:
                 return audio_array
             
-            resampled = librosa.resample(
-                audio_array,
-                orig_sr=orig_sr,
-                target_sr=target_sr
+            if type(audio_array).__module__.startswith('torch'):
+                import torchaudio
+                
+                return torchaudio.functional.resample(audio_array, orig_sr, target_sr)
+            
+            import soxr
+            
+            # soxr wants (frames, channels); like librosa and torchaudio, time is the last axis here
+            multichannel = audio_array.ndim == 2
+            resampled = soxr.resample(
+                audio_array.T if multichannel else audio_array,
+                orig_sr,
+                target_sr,
+                quality='HQ'
             )
             
-            return resampled
+            return resampled.T if multichannel else resampled
             
         except Exception as e:
             logger.error(f"Error resampling audio: {e}")
@@ -135,7 +240,7 @@ class AudioUtils:
             return audio_array
     
     @staticmethod
-    def add_fade(audio_array, sample_rate, fade_in_duration=0.1, fade_out_duration=0.1):
+    def add_fade(audio_array, sample_rate, fade_in_duration=0.1, fade_out_duration=0.1, inplace=False):
         """
         Add fade in/out to audio
         
@@ -144,27 +249,34 @@ class AudioUtils:
             sample_rate: Sample rate
             fade_in_duration: Fade in duration in seconds
             fade_out_duration: Fade out duration in seconds
+            inplace: Modify audio_array directly instead of working on a copy
             
         Returns:
             Audio with fades applied
         """
         try:
-            audio_copy = audio_array.copy()
+            audio_copy = audio_array if inplace else audio_array.copy()
+            
+            # Ramps are computed in the audio's float type (float64 for integer audio)
+            ramp_dtype = audio_copy.dtype if np.issubdtype(audio_copy.dtype, np.floating) else np.float64
             
             # Fade in
             fade_in_samples = int(fade_in_duration * sample_rate)
             fade_in_samples = min(fade_in_samples, len(audio_copy) // 2)
             
-            for i in range(fade_in_samples):
-                audio_copy[i] *= (i / fade_in_samples)
+            if fade_in_samples > 0:
+                fade_in = _fade_ramp(fade_in_samples, np.dtype(ramp_dtype), True)
+                head = audio_copy[:fade_in_samples]
+                np.multiply(head, fade_in, out=head, casting='unsafe')
             
             # Fade out
             fade_out_samples = int(fade_out_duration * sample_rate)
             fade_out_samples = min(fade_out_samples, len(audio_copy) // 2)
             
-            start_idx = len(audio_copy) - fade_out_samples
-            for i in range(fade_out_samples):
-                audio_copy[start_idx + i] *= (1.0 - (i / fade_out_samples))
+            if fade_out_samples > 0:
+                fade_out = _fade_ramp(fade_out_samples, np.dtype(ramp_dtype), False)
+                tail = audio_copy[len(audio_copy) - fade_out_samples:]
+                np.multiply(tail, fade_out, out=tail, casting='unsafe')
             
             return audio_copy
             
@@ -0,0 +1,145 @@
+"""
+Batch Scheduler Module - Coalesces concurrent TTS requests into batched generation
+"""
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    """
+    Dynamic request batcher for the TTS engine
+    Collects requests from concurrent callers and runs them through the
+    engine together, so the model decodes a batch instead of one request at a time
+    """
+
+    def __init__(self, engine, max_batch_size=8, batch_wait_timeout_s=0.05):
+        """
+        Initialize the scheduler and start its worker thread
+
+        Args:
+            engine: TTSEngine (anything exposing text_to_speech_batch, which returns
+                a result or an exception per request)
+            max_batch_size: Maximum number of requests per batch
+            batch_wait_timeout_s: How long to wait for more requests after the first one arrives
+        """
+        self.engine = engine
+        self.max_batch_size = max_batch_size
+        self.batch_wait_timeout_s = batch_wait_timeout_s
+
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="tts-batch-scheduler",
+            daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, text, voice_preset=None):
+        """
+        Queue a synthesis request
+
+        Args:
+            text: Input text
+            voice_preset: Optional voice preset
+
+        Returns:
+            Future resolving to (audio_array, sample_rate)
+        """
+        future = Future()
+        self._queue.put((text, voice_preset, future))
+        return future
+
+    def infer(self, text, voice_preset=None, timeout=None):
+        """
+        Queue a synthesis request and wait for its result
+
+        Args:
+            text: Input text
+            voice_preset: Optional voice preset
+            timeout: Seconds to wait before giving up (None waits forever)
+
+        Returns:
+            tuple: (audio_array, sample_rate)
+        """
+        return self.submit(text, voice_preset).result(timeout=timeout)
+
+    def close(self):
+        """Stop the worker thread once the queued requests have been processed"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect_batch(self):
+        """
+        Block for the first request, then gather more until the batch is full
+        or the wait timeout expires
+
+        Returns:
+            List of (text, voice_preset, future) tuples, or None on shutdown
+        """
+        item = self._queue.get()
+        if item is None:
+            return None
+
+        batch = [item]
+        deadline = time.monotonic() + self.batch_wait_timeout_s
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the sentinel back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        """Worker loop: collect and process batches until closed"""
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                break
+            self._process_batch(batch)
+
+    def _process_batch(self, batch):
+        """
+        Run one batch through the engine and resolve each request's future
+
+        Args:
+            batch: List of (text, voice_preset, future) tuples
+        """
+        # Skip requests whose callers have already given up
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        texts = [text for text, _, _ in batch]
+        voice_presets = [voice_preset for _, voice_preset, _ in batch]
+
+        logger.info(f"Processing batch of {len(batch)} request(s)")
+
+        try:
+            results = self.engine.text_to_speech_batch(texts, voice_presets)
+        except Exception as e:
+            logger.error(f"Batch generation failed: {e}")
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        # A failed item comes back as its exception and fails only its own request
+        for (_, _, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,33 @@
+"""
+JSON Provider Module - orjson-backed JSON serialization for Flask responses
+"""
+import orjson
+from flask.json.provider import JSONProvider
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    Flask JSON provider using orjson
+    Serializes in C, with native support for datetime and numpy values
+    """
+    
+    mimetype = 'application/json'
+    
+    # numpy arrays/scalars and non-string dict keys are serialized rather than rejected
+    OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, option=self.OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes"""
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """Build a JSON response straight from orjson's bytes (no str round trip)"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.OPTIONS),
+            mimetype=self.mimetype
+        )
@@ -1,12 +1,32 @@
 """
 Text Processing Module - Handles text preprocessing and validation for TTS
 """
+from functools import lru_cache
 import re
 import logging
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _build_automaton(words):
+    """Build an Aho-Corasick automaton matching any of the given words"""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
+def _is_word_char(char):
+    """Same characters as the regex \\w class"""
+    return char.isalnum() or char == '_'
+
+
 class TextProcessor:
     """
     Text processing utilities for text-to-speech
@@ -75,14 +95,23 @@ class TextProcessor:
         if not isinstance(text, str):
             text = str(text)
         
-        # Remove extra whitespace (multiple spaces, tabs, newlines)
-        # Replace any sequence of whitespace characters with a single space
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Strip leading and trailing whitespace
-        text = text.strip()
-        
-        return text
+        # Remove extra whitespace (multiple spaces, tabs, newlines) and strip the ends
+        # str.split() collapses whitespace runs in C, without the regex engine
+        return ' '.join(text.split())
+    
+    # All abbreviations in one alternation, longest first so e.g. 'vs.' wins over 'v'
+    # Lookarounds keep matches to whole words (periods are part of the abbreviation)
+    _ABBREV_PATTERN = re.compile(
+        r'(?<!\w)('
+        + '|'.join(re.escape(abbrev) for abbrev in sorted(ABBREVIATIONS, key=len, reverse=True))
+        + r')(?!\w)'
+    )
+    
+    # Same matching as _ABBREV_PATTERN in a single automaton pass (pyahocorasick, optional)
+    _ABBREV_AUTOMATON = _build_automaton(ABBREVIATIONS) if AHOCORASICK_AVAILABLE else None
+    
+    # Text can only contain an abbreviation if it has a '.' or starts one of the undotted ones
+    _ABBREV_SENTINELS = ('.',) + tuple(sorted({abbrev[0] for abbrev in ABBREVIATIONS if '.' not in abbrev}))
     
     @staticmethod
     def expand_abbreviations(text):
@@ -98,33 +127,84 @@ class TextProcessor:
         if not text:
             return text
         
-        # Sort abbreviations by length (longest first) to avoid partial matches
-        sorted_abbrevs = sorted(
-            TextProcessor.ABBREVIATIONS.items(),
-            key=lambda x: len(x[0]),
-            reverse=True
+        # Most text has no abbreviations; return it untouched when none can match
+        # (a plain loop of C-level substring checks, several times cheaper than any() over a generator)
+        for sentinel in TextProcessor._ABBREV_SENTINELS:
+            if sentinel in text:
+                break
+        else:
+            return text
+        
+        if TextProcessor._ABBREV_AUTOMATON is not None:
+            return TextProcessor._expand_with_automaton(text)
+        
+        # Single pass over the text with the precompiled pattern (case-sensitive)
+        return TextProcessor._ABBREV_PATTERN.sub(
+            lambda match: TextProcessor.ABBREVIATIONS[match.group(1)],
+            text
         )
+    
+    @staticmethod
+    def _expand_with_automaton(text):
+        """
+        Expand abbreviations found by the Aho-Corasick automaton
         
-        # Replace abbreviations (case-sensitive)
-        for abbrev, expansion in sorted_abbrevs:
-            # Escape special regex characters in the abbreviation
-            escaped_abbrev = re.escape(abbrev)
-            
-            # Pattern: word boundary or start of string, then abbreviation,
-            # then word boundary or end of string (but handle period specially)
-            # For abbreviations ending with period, we need to match the period
-            # but ensure it's not part of a larger word
-            if abbrev.endswith('.'):
-                # Match abbreviation followed by word boundary or end of string
-                # The period is part of the abbreviation, so we check for space/end after it
-                pattern = r'(?<!\w)' + escaped_abbrev + r'(?!\w)'
-            else:
-                # Regular word boundary for abbreviations without period
-                pattern = r'\b' + escaped_abbrev + r'\b'
+        Mirrors _ABBREV_PATTERN: whole-word matches only, leftmost first,
+        and the longest abbreviation wins when several start at the same place
+        
+        Args:
+            text: Input text string
+        
+        Returns:
+            Text with abbreviations expanded
+        """
+        # (start, -length, abbrev) for every whole-word match
+        matches = []
+        for end, abbrev in TextProcessor._ABBREV_AUTOMATON.iter(text):
+            start = end - len(abbrev) + 1
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end + 1 < len(text) and _is_word_char(text[end + 1]):
+                continue
+            matches.append((start, -len(abbrev), abbrev))
+        
+        if not matches:
+            return text
+        
+        matches.sort()
+        
+        pieces = []
+        position = 0
+        for start, _, abbrev in matches:
+            # Skip matches overlapping one already expanded
+            if start < position:
+                continue
+            pieces.append(text[position:start])
+            pieces.append(TextProcessor.ABBREVIATIONS[abbrev])
+            position = start + len(abbrev)
+        pieces.append(text[position:])
+        
+        return ''.join(pieces)
+    
+    # A sentence: text up to and including its terminal punctuation (or the end of the text)
+    _SENTENCE_PATTERN = re.compile(r'[^.!?]+(?:[.!?]+|$)')
+    
+    @staticmethod
+    def split_sentences(text):
+        """
+        Split text into sentences for per-sentence synthesis
+        
+        Args:
+            text: Input text string (ideally already preprocessed)
             
-            text = re.sub(pattern, expansion, text)
+        Returns:
+            List of sentence strings, punctuation kept
+        """
+        if not text:
+            return []
         
-        return text
+        sentences = (match.strip() for match in TextProcessor._SENTENCE_PATTERN.findall(text))
+        return [sentence for sentence in sentences if sentence]
     
     @staticmethod
     def validate_text(text, max_length=2000, min_length=None):
@@ -150,19 +230,22 @@ class TextProcessor:
         if not isinstance(text, str):
             text = str(text)
         
-        # Clean text first to get accurate length
-        cleaned_text = TextProcessor.clean_text(text)
+        # Length the text will have once cleaned: its words plus one space between each
+        # (measured from the split words, without building the cleaned string)
+        words = text.split()
         
-        if not cleaned_text:
+        if not words:
             return False, "Text cannot be empty"
         
+        cleaned_length = sum(map(len, words)) + len(words) - 1
+        
         # Check minimum length
-        if len(cleaned_text) < min_length:
+        if cleaned_length < min_length:
             return False, f"Text is too short (minimum {min_length} characters)"
         
         # Check maximum length
-        if len(cleaned_text) > max_length:
-            return False, f"Text is too long (maximum {max_length} characters, got {len(cleaned_text)})"
+        if cleaned_length > max_length:
+            return False, f"Text is too long (maximum {max_length} characters, got {cleaned_length})"
         
         return True, None
     
@@ -174,8 +257,10 @@ class TextProcessor:
         Steps:
         1. Clean text (remove extra whitespace)
         2. Expand abbreviations
-        3. Clean again (abbreviation expansion might add spaces)
-        4. Truncate if necessary
+        3. Truncate if necessary
+        
+        Expansion and truncation are memoized on the cleaned text, so repeated
+        prompts (however they are spaced) only pay for the clean
         
         Args:
             text: Input text string
@@ -187,28 +272,60 @@ class TextProcessor:
         if not text:
             return ""
         
-        # Step 1: Clean text
-        processed_text = TextProcessor.clean_text(text)
+        if not isinstance(text, str):
+            text = str(text)
+        
+        return _preprocess_cleaned(TextProcessor.clean_text(text), max_length)
+    
+    @staticmethod
+    def validate_and_preprocess(text, max_length=2000, min_length=None):
+        """
+        Validate and preprocess text in one pass
+        
+        Same result as validate_text() followed by preprocess_for_tts(), but the
+        text is cleaned once and the cleaned string is reused for every step
+        
+        Args:
+            text: Input text string
+            max_length: Maximum allowed text length
+            min_length: Minimum required text length (defaults to MIN_TEXT_LENGTH)
+        
+        Returns:
+            tuple: (is_valid: bool, error_message: str or None, processed_text: str or None)
+        """
+        if min_length is None:
+            min_length = TextProcessor.MIN_TEXT_LENGTH
+        
+        if not text:
+            return False, "Text cannot be empty", None
+        
+        cleaned_text = TextProcessor.clean_text(text)
+        
+        if not cleaned_text:
+            return False, "Text cannot be empty", None
         
-        # Step 2: Expand abbreviations
-        processed_text = TextProcessor.expand_abbreviations(processed_text)
+        if len(cleaned_text) < min_length:
+            return False, f"Text is too short (minimum {min_length} characters)", None
         
-        # Step 3: Clean again after abbreviation expansion
-        processed_text = TextProcessor.clean_text(processed_text)
+        if len(cleaned_text) > max_length:
+            return False, f"Text is too long (maximum {max_length} characters, got {len(cleaned_text)})", None
+        
+        return True, None, _preprocess_cleaned(cleaned_text, max_length)
+    
+    @staticmethod
+    def _truncate(text, max_length):
+        """Truncate text to max_length, preferring a nearby word boundary"""
+        if len(text) <= max_length:
+            return text
         
-        # Step 4: Truncate if too long
-        if len(processed_text) > max_length:
-            # Try to truncate at a word boundary
-            truncated = processed_text[:max_length]
-            # Find last space before max_length
-            last_space = truncated.rfind(' ')
-            if last_space > max_length * 0.8:  # Only use word boundary if it's reasonably close
-                processed_text = truncated[:last_space]
-            else:
-                processed_text = truncated
-            logger.warning(f"Text truncated to {len(processed_text)} characters")
+        truncated = text[:max_length]
+        # Split at the last space before max_length (prefix comes back from the same call)
+        prefix, space, _ = truncated.rpartition(' ')
+        if space and len(prefix) > max_length * 0.8:  # Only use word boundary if it's reasonably close
+            truncated = prefix
+        logger.warning(f"Text truncated to {len(truncated)} characters")
         
-        return processed_text
+        return truncated
     
     @staticmethod
     def estimate_duration(text, words_per_minute=None):
@@ -228,18 +345,24 @@ class TextProcessor:
         if words_per_minute is None:
             words_per_minute = TextProcessor.DEFAULT_WPM
         
-        # Clean text first
-        cleaned_text = TextProcessor.clean_text(text)
-        
-        if not cleaned_text:
-            return 0.0
+        if not isinstance(text, str):
+            text = str(text)
         
-        # Count words (split by whitespace)
-        words = cleaned_text.split()
-        word_count = len(words)
+        # Count words (split by whitespace; no cleaning needed, split() skips whitespace runs)
+        word_count = len(text.split())
         
         # Calculate duration: (word_count / words_per_minute) * 60 seconds
         duration_seconds = (word_count / words_per_minute) * 60
         
         return duration_seconds
 
+
+@lru_cache(maxsize=512)
+def _preprocess_cleaned(cleaned_text, max_length):
+    """Memoized body of TextProcessor.preprocess_for_tts, for text already passed through clean_text"""
+    # Expansions replace whole non-space tokens and have no leading, trailing or
+    # repeated spaces, so the result needs no second clean
+    processed_text = TextProcessor.expand_abbreviations(cleaned_text)
+    
+    # Truncate if too long
+    return TextProcessor._truncate(processed_text, max_length)
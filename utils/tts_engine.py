@@ -4,11 +4,14 @@ TTS Engine Module - Handles text-to-speech generation using Bark
 import torch
 import scipy
 import numpy as np
+from cachetools import LFUCache
 from transformers import AutoProcessor, BarkModel
 from pathlib import Path
+from utils.audio_utils import AudioUtils
 import logging
-import tempfile
-import os
+import threading
+import io
+import re
 try:
     from pydub import AudioSegment
     PYDUB_AVAILABLE = True
@@ -17,13 +20,31 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Write buffer for WAV output: header and PCM data go out in a few large writes
+WAV_WRITE_BUFFER_SIZE = 256 * 1024
+
+# Sentence boundaries for split_text: any run of terminal punctuation
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+
+# Supported model precisions ('int8' is dynamic quantization of Linear layers, CPU only)
+MODEL_DTYPES = {
+    'float32': torch.float32,
+    'bfloat16': torch.bfloat16,
+    'float16': torch.float16,
+    'int8': torch.float32,
+}
+
+# Let float32 matmuls use TF32 tensor cores on Ampere+ GPUs (no effect on CPU or half precision)
+torch.set_float32_matmul_precision('high')
+
 class TTSEngine:
     """
     Text-to-Speech Engine using Bark model
     Handles model loading, text preprocessing, and audio generation
     """
     
-    def __init__(self, model_name="suno/bark-small", device=None, cache_dir=None):
+    def __init__(self, model_name="suno/bark-small", device=None, cache_dir=None,
+                 dtype='auto', compile_model=False, voice_prompt_cache_size=16):
         """
         Initialize TTS Engine
         
@@ -31,7 +52,13 @@ class TTSEngine:
             model_name: Hugging Face model identifier
             device: 'cuda' or 'cpu', auto-detected if None
             cache_dir: Directory to cache model files
+            dtype: Model precision, one of MODEL_DTYPES, or 'auto' (float16 on CUDA, float32 on CPU)
+            compile_model: Compile the Bark sub-models with torch.compile
+            voice_prompt_cache_size: Voice presets kept loaded on the device (0 disables)
         """
+        if dtype != 'auto' and dtype not in MODEL_DTYPES:
+            raise ValueError(f"Unsupported model dtype: {dtype} (expected one of {', '.join(MODEL_DTYPES)})")
+        
         self.model_name = model_name
         
         # Auto-detect device
@@ -42,9 +69,26 @@ class TTSEngine:
             
         logger.info(f"Initializing TTS Engine with device: {self.device}")
         
+        if dtype == 'auto':
+            # Half precision halves weight traffic and runs on tensor cores; CPUs gain nothing from it
+            dtype = 'float16' if self.device.startswith("cuda") else 'float32'
+        elif dtype == 'int8' and self.device != "cpu":
+            logger.warning("int8 dynamic quantization is CPU-only, loading in float32")
+            dtype = 'float32'
+        elif dtype == 'float16' and self.device == "cpu":
+            logger.warning("float16 is slower than float32 on CPU, loading in float32")
+            dtype = 'float32'
+        
+        self.dtype = dtype
+        self.compile_model = compile_model
         self.cache_dir = cache_dir
         self.model = None
         self.processor = None
+        
+        # voice_preset -> history prompt tensors already on self.device (LFU-capped to bound memory)
+        self._voice_prompts = LFUCache(maxsize=voice_prompt_cache_size) if voice_prompt_cache_size > 0 else None
+        self._voice_prompts_lock = threading.Lock()
+        
         self._load_model()
     
     def _load_model(self):
@@ -60,9 +104,12 @@ class TTSEngine:
             
             # Load model
             # Note: PyTorch 2.6+ fixes the security vulnerability, so we can use default loading
+            # Checkpoints are memory-mapped (safetensors, or torch.load(mmap=True)) rather than read
+            # into a private buffer; keep MODEL_CACHE_DIR on a local disk so pages come from the page cache
             self.model = BarkModel.from_pretrained(
                 self.model_name,
-                cache_dir=self.cache_dir
+                cache_dir=self.cache_dir,
+                torch_dtype=MODEL_DTYPES[self.dtype]
             )
             
             # Set pad_token_id if not already set (prevents warning)
@@ -81,7 +128,21 @@ class TTSEngine:
             # Set to evaluation mode
             self.model.eval()
             
-            logger.info("Model loaded successfully")
+            # int8: quantize Linear weights, activations are quantized on the fly
+            if self.dtype == 'int8':
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            
+            # generate() is plain Python, so compile the transformer forwards it drives
+            # (compiling BarkModel itself would only wrap a forward() that generate never calls)
+            # No CUDA graphs (reduce-overhead): the decode loop grows the sequence every step
+            # without a static cache, and the model is called from several threads
+            if self.compile_model:
+                for sub_model in (self.model.semantic, self.model.coarse_acoustics, self.model.fine_acoustics):
+                    sub_model.forward = torch.compile(sub_model.forward)
+            
+            logger.info(f"Model loaded successfully ({self.dtype}{', compiled' if self.compile_model else ''})")
             
         except Exception as e:
             logger.error(f"Error loading model: {e}")
@@ -107,7 +168,7 @@ class TTSEngine:
             logger.warning(f"Text truncated to {max_length} characters")
         
         # Add period if missing (helps with prosody)
-        if text and text[-1] not in '.!?':
+        if text and not text.endswith(('.', '!', '?')):
             text += '.'
         
         return text
@@ -123,23 +184,26 @@ class TTSEngine:
         Returns:
             List of text chunks
         """
-        # Split by sentences
-        sentences = text.replace('!', '.').replace('?', '.').split('.')
-        sentences = [s.strip() + '.' for s in sentences if s.strip()]
+        # Split by sentences (one regex pass instead of two replaces and a split)
+        sentences = [s.strip() + '.' for s in SENTENCE_SPLIT_PATTERN.split(text) if s.strip()]
         
         chunks = []
-        current_chunk = ""
+        # Sentences of the chunk being built, joined once when it is flushed
+        current_chunk = []
+        current_length = 0
         
         for sentence in sentences:
-            if len(current_chunk) + len(sentence) <= max_chunk_length:
-                current_chunk += " " + sentence
+            if current_length + len(sentence) <= max_chunk_length:
+                current_chunk.append(sentence)
+                current_length += len(sentence) + 1
             else:
                 if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
+                    chunks.append(' '.join(current_chunk))
+                current_chunk = [sentence]
+                current_length = len(sentence)
         
         if current_chunk:
-            chunks.append(current_chunk.strip())
+            chunks.append(' '.join(current_chunk))
         
         return chunks
     
@@ -162,30 +226,11 @@ class TTSEngine:
             if len(text) > 250:
                 return self._generate_long_speech(text, voice_preset)
             
-            # Prepare inputs
-            inputs = self.processor(
-                text,
-                voice_preset=voice_preset,
-                return_tensors="pt"
-            )
-            
-            # Move inputs to device
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            # Generate speech
+            # Generate speech as a batch of one: shares the voice prompt cache and the
+            # pinned, non-blocking copy back to the host with the batched path
             # pad_token_id is handled in generation_config, so no need to pass it explicitly
-            with torch.no_grad():
-                speech_output = self.model.generate(**inputs)
-            
-            # Convert to numpy array
-            audio_array = speech_output[0].cpu().numpy()
-            
-            # Ensure audio is 1D array (flatten if needed)
-            if audio_array.ndim > 1:
-                audio_array = audio_array.flatten()
-            
-            # Get sample rate
-            sample_rate = self.model.generation_config.sample_rate
+            audio_arrays, sample_rate = self._generate_batch([text], voice_preset)
+            audio_array = audio_arrays[0]
             
             logger.info(f"Generated audio: {len(audio_array)} samples at {sample_rate}Hz")
             
@@ -209,38 +254,261 @@ class TTSEngine:
         chunks = self.split_text(text)
         logger.info(f"Split text into {len(chunks)} chunks")
         
-        audio_chunks = []
-        sample_rate = None
+        # All chunks go through the model together as one padded batch
+        audio_chunks, sample_rate = self._generate_batch(chunks, voice_preset)
         
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Generating chunk {i+1}/{len(chunks)}")
+        # Concatenate all chunks
+        full_audio = np.concatenate(audio_chunks)
+        
+        logger.info(f"Concatenated {len(chunks)} chunks into full audio")
+        
+        return full_audio, sample_rate
+    
+    def _get_voice_prompt(self, voice_preset):
+        """
+        Get a voice preset's history prompt, loading it onto the device on first use
+        
+        Args:
+            voice_preset: Voice preset name (e.g., "v2/en_speaker_6")
+        
+        Returns:
+            BatchFeature with semantic/coarse/fine prompt tensors on self.device
+        """
+        with self._voice_prompts_lock:
+            history_prompt = self._voice_prompts.get(voice_preset)
+        
+        if history_prompt is None:
+            # Let the processor resolve, load and validate the preset as it normally would
+            history_prompt = self.processor(
+                "",
+                voice_preset=voice_preset,
+                return_tensors="pt"
+            )["history_prompt"].to(self.device)
             
+            with self._voice_prompts_lock:
+                self._voice_prompts[voice_preset] = history_prompt
+            logger.info(f"Cached voice prompt for {voice_preset}")
+        
+        return history_prompt
+    
+    def _prepare_inputs(self, texts, voice_preset=None):
+        """
+        Tokenize text and attach the voice preset's history prompt, on self.device
+        
+        Args:
+            texts: Text string or list of text strings
+            voice_preset: Optional voice preset name or history prompt dict
+        
+        Returns:
+            Dict of model inputs for generate()
+        """
+        if voice_preset is None or self._voice_prompts is None or not isinstance(voice_preset, str):
             inputs = self.processor(
-                chunk,
+                texts,
                 voice_preset=voice_preset,
                 return_tensors="pt"
             )
-            
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                speech_output = self.model.generate(**inputs)
-            
-            audio_chunk = speech_output[0].cpu().numpy()
-            # Ensure audio is 1D array (flatten if needed)
-            if audio_chunk.ndim > 1:
-                audio_chunk = audio_chunk.flatten()
-            audio_chunks.append(audio_chunk)
-            
-            if sample_rate is None:
-                sample_rate = self.model.generation_config.sample_rate
+            return {k: v.to(self.device) for k, v in inputs.items()}
         
-        # Concatenate all chunks
-        full_audio = np.concatenate(audio_chunks)
+        inputs = self.processor(texts, return_tensors="pt")
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        inputs["history_prompt"] = self._get_voice_prompt(voice_preset)
+        return inputs
+    
+    def _generate_batch(self, texts, voice_preset=None):
+        """
+        Generate speech for several preprocessed texts in a single forward pass
         
-        logger.info(f"Concatenated {len(chunks)} chunks into full audio")
+        Args:
+            texts: List of preprocessed text strings (each short enough for one generation)
+            voice_preset: Optional voice preset shared by the whole batch
         
-        return full_audio, sample_rate
+        Returns:
+            tuple: (list_of_audio_arrays, sample_rate)
+        """
+        return self._finish_batch(self._start_batch(texts, voice_preset))
+    
+    def _start_batch(self, texts, voice_preset=None):
+        """
+        Run generate() for a batch and start copying its audio back to the host
+        
+        On CUDA the device-to-host copy goes into pinned memory without blocking,
+        so the caller can queue the next batch while this one is still in flight
+        
+        Args:
+            texts: List of preprocessed text strings (each short enough for one generation)
+            voice_preset: Optional voice preset shared by the whole batch
+        
+        Returns:
+            Pending batch to pass to _finish_batch()
+        """
+        # The preset's prompt tensors are reused from the device-resident cache
+        inputs = self._prepare_inputs(texts, voice_preset)
+        
+        # Output lengths (a plain list of ints) let us strip the padding each row gets in a batch
+        # inference_mode also skips the version-counter and view tracking no_grad still does
+        with torch.inference_mode():
+            speech_output, output_lengths = self.model.generate(
+                **inputs,
+                return_output_lengths=True
+            )
+        
+        speech_output = speech_output.float()
+        output_lengths = list(output_lengths)
+        
+        if speech_output.device.type != 'cuda':
+            return speech_output.cpu(), output_lengths, None
+        
+        # Only the audio lives on the device; the lengths are already on the host
+        host_audio = torch.empty(speech_output.shape, dtype=speech_output.dtype, pin_memory=True)
+        host_audio.copy_(speech_output, non_blocking=True)
+        
+        copy_done = torch.cuda.Event()
+        copy_done.record()
+        
+        return host_audio, output_lengths, copy_done
+    
+    def _finish_batch(self, pending):
+        """
+        Wait for a batch started by _start_batch() and split it into per-text audio
+        
+        Args:
+            pending: Value returned by _start_batch()
+        
+        Returns:
+            tuple: (list_of_audio_arrays, sample_rate)
+        """
+        host_audio, output_lengths, copy_done = pending
+        
+        if copy_done is not None:
+            copy_done.synchronize()
+        
+        speech_output = host_audio.numpy()
+        
+        audio_arrays = [
+            speech_output[i, :length] for i, length in enumerate(output_lengths)
+        ]
+        sample_rate = self.model.generation_config.sample_rate
+        
+        logger.info(f"Generated batch of {len(audio_arrays)} audio clips at {sample_rate}Hz")
+        
+        return audio_arrays, sample_rate
+    
+    def text_to_speech_batch(self, texts, voice_presets=None):
+        """
+        Generate speech for several requests at once
+        Requests sharing a voice preset are decoded together in one batch;
+        long texts are split into chunks that form a batch of their own
+        
+        Every batch is started before any is collected, so on CUDA the audio of
+        one batch is copied back while the next one is being generated
+        
+        A batch that fails only fails the requests in it: their results are the
+        exception instead of audio, so one bad request can't sink the others
+        
+        Args:
+            texts: List of input texts
+            voice_presets: Optional list of voice presets (one per text)
+        
+        Returns:
+            List of (audio_array, sample_rate) tuples or exceptions, in input order
+        """
+        if voice_presets is None:
+            voice_presets = [None] * len(texts)
+        
+        results = [None] * len(texts)
+        groups = {}
+        # (result indices, concatenate rows into one result, pending batch)
+        pending = []
+        
+        def fail(indices, error):
+            logger.error(f"Batch generation failed for {len(indices)} request(s): {error}")
+            for i in indices:
+                results[i] = error
+        
+        for i, (text, voice_preset) in enumerate(zip(texts, voice_presets)):
+            text = self.preprocess_text(text)
+            if len(text) > 250:
+                chunks = self.split_text(text)
+                logger.info(f"Split text into {len(chunks)} chunks")
+                try:
+                    pending.append(([i], True, self._start_batch(chunks, voice_preset)))
+                except Exception as e:
+                    fail([i], e)
+            else:
+                groups.setdefault(voice_preset, []).append((i, text))
+        
+        for voice_preset, items in groups.items():
+            indices = [i for i, _ in items]
+            try:
+                batch = self._start_batch([text for _, text in items], voice_preset)
+            except Exception as e:
+                fail(indices, e)
+                continue
+            pending.append((indices, False, batch))
+        
+        for indices, concatenate, batch in pending:
+            try:
+                audio_arrays, sample_rate = self._finish_batch(batch)
+            except Exception as e:
+                fail(indices, e)
+                continue
+            if concatenate:
+                results[indices[0]] = (np.concatenate(audio_arrays), sample_rate)
+            else:
+                for i, audio_array in zip(indices, audio_arrays):
+                    results[i] = (audio_array, sample_rate)
+        
+        return results
+    
+    @staticmethod
+    def to_int16(audio_array):
+        """
+        Convert audio to 16-bit PCM
+        
+        Args:
+            audio_array: Audio data (float in [-1, 1] or integer)
+        
+        Returns:
+            int16 numpy array
+        """
+        if audio_array.dtype == np.int16:
+            return audio_array
+        
+        # Clip to [-1, 1] and scale in a single pass
+        if audio_array.dtype in [np.float32, np.float64]:
+            return AudioUtils.float_to_int16(audio_array)
+        
+        # If already integer, just ensure it's int16
+        return audio_array.astype(np.int16)
+    
+    @staticmethod
+    def to_pcm16(audio_array):
+        """
+        Normalize audio for encoding: 1-D int16 in one step
+        
+        np.ravel is a view for contiguous audio (flatten() always copied)
+        
+        Args:
+            audio_array: Audio data of any shape (float in [-1, 1] or integer)
+        
+        Returns:
+            1-D int16 numpy array
+        """
+        return TTSEngine.to_int16(np.ravel(audio_array))
+    
+    @staticmethod
+    def _write_wav(path, sample_rate, audio_array):
+        """
+        Write a WAV file through a large write buffer
+        
+        Args:
+            path: Output file path
+            sample_rate: Sample rate in Hz
+            audio_array: Audio data (int16)
+        """
+        with open(path, 'wb', buffering=WAV_WRITE_BUFFER_SIZE) as f:
+            scipy.io.wavfile.write(f, sample_rate, audio_array)
     
     def save_audio(self, audio_array, sample_rate, output_path):
         """
@@ -250,6 +518,9 @@ class TTSEngine:
             audio_array: Audio data as numpy array
             sample_rate: Sample rate in Hz
             output_path: Output file path (extension determines format)
+        
+        Returns:
+            Path the audio was written to (extension changes if MP3 falls back to WAV)
         """
         try:
             output_path = Path(output_path)
@@ -257,23 +528,12 @@ class TTSEngine:
 
             # Ensure sample rate is an int
             sample_rate = int(sample_rate)
-
-            # Ensure audio is 1D array
-            if audio_array.ndim > 1:
-                audio_array = audio_array.flatten()
             
             # Get file extension
             file_ext = output_path.suffix.lower()
             
-            # Bark returns float audio in range [-1, 1]; convert to int16 for broad player support
-            if audio_array.dtype != np.int16:
-                # Normalize to [-1, 1] if needed
-                if audio_array.dtype in [np.float32, np.float64]:
-                    clipped = np.clip(audio_array, -1.0, 1.0)
-                    audio_array = (clipped * 32767.0).astype(np.int16)
-                else:
-                    # If already integer, just ensure it's int16
-                    audio_array = audio_array.astype(np.int16)
+            # Bark returns float audio in range [-1, 1]; convert to 1-D int16 for broad player support
+            audio_array = self.to_pcm16(audio_array)
             
             # Save based on format
             if file_ext == '.mp3':
@@ -283,48 +543,95 @@ class TTSEngine:
                     output_path = output_path.with_suffix('.wav')
                     file_ext = '.wav'
                 else:
-                    # Save as MP3 using pydub
-                    # First, save as temporary WAV file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                        temp_wav_path = temp_wav.name
-                        
+                    # Save as MP3 using pydub, fed the int16 PCM directly (no temporary WAV file)
                     try:
-                        # Write WAV file first
-                        scipy.io.wavfile.write(temp_wav_path, sample_rate, audio_array)
-                        
-                        # Convert WAV to MP3 using pydub (requires ffmpeg)
-                        try:
-                            audio_segment = AudioSegment.from_wav(temp_wav_path)
-                            audio_segment.export(str(output_path), format="mp3", bitrate="192k")
-                            logger.info(f"Audio saved as MP3 to: {output_path}")
-                            return  # Successfully saved as MP3, exit early
-                        except Exception as e:
-                            logger.warning(f"MP3 conversion failed (ffmpeg may not be installed): {e}")
-                            logger.warning(f"Falling back to WAV format. To enable MP3, install ffmpeg:")
-                            logger.warning(f"  Windows: Download from https://ffmpeg.org/download.html and add to PATH")
-                            logger.warning(f"  Linux: sudo apt-get install ffmpeg")
-                            logger.warning(f"  Mac: brew install ffmpeg")
-                            # Fall back to WAV by changing extension
-                            output_path = output_path.with_suffix('.wav')
-                            file_ext = '.wav'
-                        
-                    finally:
-                        # Clean up temporary WAV file
-                        if os.path.exists(temp_wav_path):
-                            os.unlink(temp_wav_path)
+                        audio_segment = AudioSegment(
+                            data=audio_array.tobytes(),
+                            sample_width=audio_array.dtype.itemsize,
+                            frame_rate=sample_rate,
+                            channels=1
+                        )
+                        # Encoding requires ffmpeg
+                        audio_segment.export(str(output_path), format="mp3", bitrate="192k")
+                        logger.info(f"Audio saved as MP3 to: {output_path}")
+                        return output_path  # Successfully saved as MP3, exit early
+                    except Exception as e:
+                        logger.warning(f"MP3 conversion failed (ffmpeg may not be installed): {e}")
+                        logger.warning(f"Falling back to WAV format. To enable MP3, install ffmpeg:")
+                        logger.warning(f"  Windows: Download from https://ffmpeg.org/download.html and add to PATH")
+                        logger.warning(f"  Linux: sudo apt-get install ffmpeg")
+                        logger.warning(f"  Mac: brew install ffmpeg")
+                        # Fall back to WAV by changing extension
+                        output_path = output_path.with_suffix('.wav')
+                        file_ext = '.wav'
             
             # Save as WAV (either requested format or fallback)
-            scipy.io.wavfile.write(
-                str(output_path),
-                rate=sample_rate,
-                data=audio_array
-            )
+            self._write_wav(output_path, sample_rate, audio_array)
             logger.info(f"Audio saved as WAV to: {output_path}")
+            
+            return output_path
 
         except Exception as e:
             logger.error(f"Error saving audio: {e}")
             raise
     
+    def encode_audio(self, audio_array, sample_rate, audio_format='wav'):
+        """
+        Encode audio to an in-memory file (no disk IO)
+        
+        Args:
+            audio_array: Audio data as numpy array
+            sample_rate: Sample rate in Hz
+            audio_format: 'wav' or 'mp3'
+        
+        Returns:
+            tuple: (encoded_bytes, actual_format) - format falls back to 'wav' if MP3 is unavailable
+        """
+        sample_rate = int(sample_rate)
+        audio_array = self.to_pcm16(audio_array)
+        
+        buffer = io.BytesIO()
+        
+        if audio_format == 'mp3':
+            if not PYDUB_AVAILABLE:
+                logger.warning("pydub not available, falling back to WAV format")
+            else:
+                try:
+                    audio_segment = AudioSegment(
+                        data=audio_array.tobytes(),
+                        sample_width=audio_array.dtype.itemsize,
+                        frame_rate=sample_rate,
+                        channels=1
+                    )
+                    audio_segment.export(buffer, format="mp3", bitrate="192k")
+                    return buffer.getvalue(), 'mp3'
+                except Exception as e:
+                    logger.warning(f"MP3 encoding failed (ffmpeg may not be installed), falling back to WAV: {e}")
+                    buffer = io.BytesIO()
+        
+        scipy.io.wavfile.write(buffer, sample_rate, audio_array)
+        return buffer.getvalue(), 'wav'
+    
+    def text_to_speech_bytes(self, text, voice_preset=None, audio_format='wav'):
+        """
+        Complete pipeline: text to encoded audio bytes
+        
+        Args:
+            text: Input text
+            voice_preset: Optional voice preset
+            audio_format: 'wav' or 'mp3'
+        
+        Returns:
+            tuple: (encoded_bytes, actual_format)
+        """
+        audio_array, sample_rate = self.generate_speech(text, voice_preset)
+        return self.encode_audio(audio_array, sample_rate, audio_format)
+    
+    @property
+    def sample_rate(self):
+        """Output sample rate of the loaded model in Hz"""
+        return self.model.generation_config.sample_rate
+    
     def text_to_speech_file(self, text, output_path, voice_preset=None):
         """
         Complete pipeline: text to speech file